@@ -0,0 +1,126 @@
+import re
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Usage: python -m benchmarks.fake_veo --port 8766 --latency 20
+#        VEO_BASE_URL=http://localhost:8766 VEO_CLIP_SCENES=all python main.py
+#
+# Speaks just enough of the Gemini API long-running video surface for nodes/video_gen.py:
+#   POST /v1beta/models/<model>:predictLongRunning      -> operation name
+#   GET  /v1beta/models/<model>/operations/<id>          -> done after --latency seconds
+#   GET  /v1beta/files/<id>:download?alt=media           -> a synthetic testsrc2 MP4
+
+
+def make_clip(seconds, width=720, height=1280):
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as f:
+        subprocess.run([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=24:duration={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", f.name
+        ], check=True)
+        return open(f.name, "rb").read()
+
+
+class FakeVeo:
+    def __init__(self, latency_s, fail_every=0):
+        self.latency_s = latency_s
+        self.fail_every = fail_every
+        self.ops = {}
+        self.clips = {}
+        self.lock = threading.Lock()
+        self.concurrent_peak = 0
+
+    def start(self, model, body):
+        params = (body.get("parameters") or {})
+        with self.lock:
+            op_id = str(len(self.ops) + 1)
+            self.ops[op_id] = {
+                "model": model, "started": time.monotonic(), "polls": 0,
+                "seconds": int(params.get("durationSeconds") or 4),
+                "fail": bool(self.fail_every and int(op_id) % self.fail_every == 0),
+            }
+            running = sum(1 for op in self.ops.values() if time.monotonic() - op["started"] < self.latency_s)
+            self.concurrent_peak = max(self.concurrent_peak, running)
+        return {"name": f"models/{model}/operations/{op_id}"}
+
+    def get(self, model, op_id):
+        op = self.ops.get(op_id)
+        if op is None:
+            return None
+        op["polls"] += 1
+        name = f"models/{model}/operations/{op_id}"
+        if time.monotonic() - op["started"] < self.latency_s:
+            return {"name": name, "done": False}
+        if op["fail"]:
+            return {"name": name, "done": True, "error": {"code": 3, "message": "fake safety filter"}}
+        return {"name": name, "done": True, "response": {"generateVideoResponse": {"generatedSamples": [
+            # The SDK only parses https:// download URIs, so a plain-http fake hands back the file name
+            {"video": {"uri": f"files/{op_id}"}}
+        ]}}}
+
+    def clip(self, op_id):
+        if op_id not in self.clips:
+            self.clips[op_id] = make_clip(self.ops[op_id]["seconds"])
+        return self.clips[op_id]
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            match = re.match(r"/v1beta/models/([^/:]+):predictLongRunning", self.path)
+            if not match:
+                return self._json(404, {"error": {"code": 404, "message": self.path}})
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            self._json(200, fake.start(match.group(1), body))
+
+        def do_GET(self):
+            match = re.match(r"/v1beta/models/([^/]+)/operations/(\d+)", self.path)
+            if match:
+                op = fake.get(match.group(1), match.group(2))
+                return self._json(200, op) if op else self._json(404, {"error": {"code": 404}})
+            match = re.match(r"/v1beta/files/(\d+):download", self.path)
+            if match and match.group(1) in fake.ops:
+                data = fake.clip(match.group(1))
+                self.send_response(200)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                return self.wfile.write(data)
+            self._json(404, {"error": {"code": 404, "message": self.path}})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8766, latency_s=20.0, fail_every=0, background=False):
+    fake = FakeVeo(latency_s, fail_every)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fake))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, fake
+    print(f"Fake Veo listening on http://127.0.0.1:{port} (latency {latency_s}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake of the Veo long-running operations API.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=20.0, help="seconds until each operation completes")
+    parser.add_argument("--fail-every", type=int, default=0, help="make every Nth operation fail")
+    args = parser.parse_args()
+    serve(args.port, args.latency, args.fail_every)
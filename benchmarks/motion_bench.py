@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from utils.motion import MOTION_ENGINES, ZOOM_FPS, motion_args
+
+# Usage: python -m benchmarks.motion_bench --seconds 6 --encode
+
+
+def make_still(path, width=768, height=1408):
+    """Synthetic Imagen-sized 9:16 still with plenty of detail for the scaler to chew on."""
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=1",
+        "-frames:v", "1", path
+    ], check=True, capture_output=True)
+
+
+def bench_engine(engine, image_path, seconds, encode):
+    """Renders one scene with the given engine and returns frames-per-second of wall time."""
+    input_args, v_filter = motion_args(engine, seconds)
+    cmd = ["ffmpeg", "-y", *input_args, "-i", image_path, "-vf", v_filter, "-an", "-t", f"{seconds:.3f}"]
+    if encode:
+        cmd += ["-c:v", "libx264", "-crf", "12", "-preset", "veryfast", "-f", "mp4", os.devnull]
+    else:
+        cmd += ["-f", "null", "-"]
+
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    wall = time.perf_counter() - start
+    frames = int(seconds * ZOOM_FPS)
+    return {"engine": engine, "frames": frames, "wall_s": round(wall, 3), "fps": round(frames / wall, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare motion engines for a single scene.")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--encode", action="store_true", help="include libx264 cost, not just filtering")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        still = os.path.join(tmp, "still.png")
+        make_still(still)
+
+        results = []
+        for engine in MOTION_ENGINES:
+            runs = [bench_engine(engine, still, args.seconds, args.encode) for _ in range(args.runs)]
+            best = max(runs, key=lambda r: r["fps"])
+            results.append(best)
+            print(f"{engine:>12}: {best['fps']:>7.1f} fps ({best['wall_s']:.2f}s for {best['frames']} frames)")
+
+    baseline = results[0]["fps"]
+    for r in results[1:]:
+        print(f"{r['engine']} speedup vs {results[0]['engine']}: {r['fps'] / baseline:.2f}x")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
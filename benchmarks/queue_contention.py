@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+from collections import Counter
+
+# Usage: python -m benchmarks.queue_contention --workers 4 --jobs 200 [--queue /mnt/share/q.sqlite]
+#
+# Claim-safety check for utils/render_queue.py: several worker processes claim from one queue at once
+# and every job must be claimed exactly once. Point --queue at the shared mount to check its locking.
+
+WORKER = """
+import sys
+import time
+from utils import render_queue
+worker, start_at = sys.argv[1], float(sys.argv[2])
+render_queue._connection()
+time.sleep(max(0.0, start_at - time.time()))  # every worker starts claiming at the same moment
+while True:
+    job = render_queue.claim(worker)
+    if job is None:
+        break
+    print(job[0], flush=True)
+    render_queue.complete(job[0], worker, {})
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent render-queue claims")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--queue", default=None, help="queue file (default: a fresh temp file)")
+    args = parser.parse_args()
+
+    path = args.queue or os.path.join(tempfile.mkdtemp(), "render_queue.sqlite")
+    env = {**os.environ, "RENDER_QUEUE_PATH": path}
+    os.environ["RENDER_QUEUE_PATH"] = path
+    from utils import render_queue  # reads RENDER_QUEUE_PATH at import
+
+    job_ids = {render_queue.submit(0, {"job": i, "nonce": time.time()}) for i in range(args.jobs)}
+    start_at = time.time() + 2.0
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, f"bench-{n}", str(start_at)], env=env, stdout=subprocess.PIPE, text=True
+        )
+        for n in range(args.workers)
+    ]
+    claims = Counter()
+    per_worker = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        ids = [int(line) for line in out.split()]
+        per_worker.append(len(ids))
+        claims.update(ids)
+    wall = time.time() - start_at
+
+    twice = sorted(job_id for job_id, n in claims.items() if n > 1)
+    missed = sorted(job_ids - set(claims))
+    print(f"{args.jobs} jobs, {args.workers} workers, {wall:.2f}s; claims per worker: {per_worker}")
+    print(f"claimed twice: {twice or 'none'}; never claimed: {missed or 'none'}")
+    if twice or missed or any(p.returncode for p in procs):
+        sys.exit(1)
+    print("✅ every job claimed exactly once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import resource
+import itertools
+import subprocess
+import tempfile
+
+# Usage: python -m benchmarks.render_bench --scenes 7,13,30 --durations 30,60 --resolutions 768x1408 --presets veryfast,slow
+#        python -m benchmarks.render_bench --scenes 10 --keep   (leave the scratch assets dir for inspection)
+#
+# Every case renders from scratch in its own process with ASSETS_DIR pointed at a scratch directory,
+# so segment/audio caches, encode history and the asset index of the real assets/ are never touched
+# and peak RSS (a per-process high-water mark) belongs to that case alone.
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_history.jsonl")
+
+BENCH_ROW = 9001
+WORDS_PER_SECOND = 2.6  # typical narration pace of our voiceovers
+FILLER = "why does the sky look blue when sunlight is white and space is black".split()
+
+
+# --- SYNTHETIC INPUTS (plain ffmpeg lavfi sources, no API calls) ---
+def ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *args], check=True)
+
+
+def make_scene_images(assets_dir, count, width, height):
+    """One distinct testsrc2 frame per scene, so no two scenes share a segment cache key."""
+    paths = []
+    for i in range(count):
+        path = os.path.join(assets_dir, f"row_{BENCH_ROW}_scene_{i + 1}.png")
+        ffmpeg(
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=25",
+            "-vf", f"select=eq(n\\,{i * 13})", "-frames:v", "1", path
+        )
+        paths.append(path)
+    return paths
+
+
+def make_voiceover(assets_dir, duration):
+    path = os.path.join(assets_dir, f"vo_row_{BENCH_ROW}.mp3")
+    ffmpeg(
+        "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={duration}",
+        "-c:a", "libmp3lame", "-b:a", "128k", path
+    )
+    return path
+
+
+def make_music(assets_dir, duration):
+    """A library track so the benchmark also pays for loudnorm, the music bed and ducking."""
+    path = os.path.join(assets_dir, "bkg_music_bench.mp3")
+    ffmpeg(
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+        "-af", "volume=0.3", "-c:a", "libmp3lame", "-b:a", "128k", path
+    )
+    return path
+
+
+def make_alignment(assets_dir, duration):
+    """ElevenLabs-shaped character timestamps spread evenly over the voiceover."""
+    words = list(itertools.islice(itertools.cycle(FILLER), max(1, int(duration * WORDS_PER_SECOND))))
+    chars = list(" ".join(words) + ".")
+    step = duration / len(chars)
+    alignment = {
+        "characters": chars,
+        "character_start_times_seconds": [round(i * step, 3) for i in range(len(chars))],
+        "character_end_times_seconds": [round((i + 1) * step, 3) for i in range(len(chars))],
+    }
+    with open(os.path.join(assets_dir, f"alignment_row_{BENCH_ROW}.json"), "w") as f:
+        json.dump(alignment, f)
+    return alignment
+
+
+def prepare_inputs(assets_dir, case):
+    width, height = (int(v) for v in case["resolution"].split("x"))
+    images = make_scene_images(assets_dir, case["scenes"], width, height)
+    make_voiceover(assets_dir, case["duration"])
+    make_music(assets_dir, case["duration"] + 5)
+    make_alignment(assets_dir, case["duration"])
+    return images
+
+
+# --- WORKER (one process per case; ASSETS_DIR is already set when config is imported) ---
+def run_worker(case, images):
+    import logging
+    from nodes.video_assembly import video_stitching_slideshow
+    from utils.encode_profiles import ENCODE_PROFILES, load_history
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    ENCODE_PROFILES["bench"] = {"preset": case["preset"], "crf": case["crf"]}
+    scene_dur = case["duration"] / case["scenes"]
+    state = {
+        "row_index": BENCH_ROW,
+        "idea": "render benchmark",
+        "script": {"scenes": [{"Scene_Duration": scene_dur} for _ in range(case["scenes"])]},
+        "image_paths": images,
+        "topic_comment": "BENCHMARK",
+        "encode_profile": "bench",
+        "renditions": [],
+        "publish": False,
+    }
+
+    start = time.perf_counter()
+    state = video_stitching_slideshow(state)
+    wall = time.perf_counter() - start
+    if not state.get("isvideogenerated"):
+        raise SystemExit(f"render failed for case {case}")
+
+    video_dur = case["duration"] + 1.5  # the node appends the CTA pause
+    final_pass = load_history(limit=1)
+    children, own = resource.getrusage(resource.RUSAGE_CHILDREN), resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        **case,
+        "wall_s": round(wall, 2),
+        "final_pass_s": final_pass[-1]["wall_s"] if final_pass else None,
+        "realtime_factor": round(video_dur / wall, 3),
+        "peak_rss_mb": round(max(children.ru_maxrss, own.ru_maxrss) / 1024, 1),  # ru_maxrss is KiB on Linux
+        "output_mb": round(os.path.getsize(state["final_video_path"]) / 1e6, 2),
+    }
+
+
+# --- DRIVER ---
+def case_id(case):
+    return f"{case['scenes']}sc_{case['duration']:g}s_{case['resolution']}_{case['preset']}"
+
+
+def run_case(case, keep=False):
+    assets_dir = tempfile.mkdtemp(prefix="render_bench_")
+    try:
+        images = prepare_inputs(assets_dir, case)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.render_bench", "--worker", json.dumps({"case": case, "images": images})],
+            env={**os.environ, "ASSETS_DIR": assets_dir}, stdout=subprocess.PIPE, check=True, text=True
+        )
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        if keep:
+            print(f"   assets kept in {assets_dir}")
+        else:
+            shutil.rmtree(assets_dir, ignore_errors=True)
+
+
+def environment_info():
+    def first_line(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True).stdout.splitlines()[0]
+        except (OSError, IndexError):
+            return None
+    return {
+        "host": socket.gethostname(),
+        "cpus": os.cpu_count(),
+        "commit": first_line(["git", "rev-parse", "--short", "HEAD"]),
+        "ffmpeg": first_line(["ffmpeg", "-version"]),
+    }
+
+
+def load_previous(history_path, host):
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, "r") as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    runs = [r for r in runs if r.get("host") == host]
+    return runs[-1] if runs else None
+
+
+def print_table(results, previous):
+    before = {case_id(r): r for r in (previous or {}).get("cases", [])}
+    print(f"{'case':<32} {'wall':>8} {'final':>8} {'x rt':>6} {'rss MB':>8} {'out MB':>8}  vs last")
+    for r in results:
+        old = before.get(case_id(r))
+        delta = f"{(r['wall_s'] / old['wall_s'] - 1) * 100:+.1f}%" if old else "-"
+        final = f"{r['final_pass_s']:.1f}s" if r["final_pass_s"] is not None else "-"
+        print(
+            f"{case_id(r):<32} {r['wall_s']:>7.1f}s {final:>8} {r['realtime_factor']:>6.2f}"
+            f" {r['peak_rss_mb']:>8.0f} {r['output_mb']:>8.1f}  {delta}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video_stitching_slideshow over a render matrix.")
+    parser.add_argument("--scenes", default="7,10,13", help="comma-separated scene counts")
+    parser.add_argument("--durations", default="45", help="comma-separated voiceover lengths in seconds")
+    parser.add_argument("--resolutions", default="768x1408", help="comma-separated source still sizes (WxH)")
+    parser.add_argument("--presets", default="veryfast", help="comma-separated libx264 presets for the final pass")
+    parser.add_argument("--crf", type=int, default=18)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-save", action="store_true", help="print results without appending to the history")
+    parser.add_argument("--keep", action="store_true", help="keep each case's scratch assets directory")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        job = json.loads(args.worker)
+        print(json.dumps(run_worker(job["case"], job["images"])))
+        return
+
+    matrix = [
+        {"scenes": int(s), "duration": float(d), "resolution": res, "preset": preset, "crf": args.crf}
+        for s, d, res, preset in itertools.product(
+            args.scenes.split(","), args.durations.split(","), args.resolutions.split(","), args.presets.split(",")
+        )
+    ]
+    env = environment_info()
+    previous = load_previous(args.history, env["host"])
+
+    results = []
+    for n, case in enumerate(matrix, start=1):
+        print(f"[{n}/{len(matrix)}] {case_id(case)} ...", flush=True)
+        results.append(run_case(case, args.keep))
+
+    print_table(results, previous)
+    if not args.no_save:
+        with open(args.history, "a") as f:
+            f.write(json.dumps({"timestamp": time.time(), **env, "cases": results}) + "\n")
+        print(f"Saved to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
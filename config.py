@@ -13,7 +13,7 @@ VEO_API_KEY = os.getenv("VEO_API_KEY")
 IDEA_GENERATION_MODEL = "gemini-2.5-flash-preview-09-2025"
 VIDEO_METADATA_GENERATION_MODEL = "gemini-2.0-flash"
 ELEVENLABS_MODEL = "eleven_multilingual_v2"
-IMAGEN_MODEL = "imagen-4.0-ultra-generate-001"
+IMAGEN_MODEL = os.getenv("IMAGEN_MODEL", "imagen-4.0-ultra-generate-001")
 CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
 VEO_MODEL_NAME = "veo-3.1-generate-001"
 
@@ -29,9 +29,72 @@ INSTA_ACCOUNT_ID = os.getenv("INSTA_ACCOUNT_ID")
 VOICE_IDS = [v.strip() for v in os.getenv("ELEVENLABS_VOICE_IDS", "").split(",") if v.strip()]
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR = os.path.join(BASE_DIR, "assets")
+# ASSETS_DIR relocates every generated file (benchmarks point it at a scratch directory)
+OUTPUT_DIR = os.getenv("ASSETS_DIR") or os.path.join(BASE_DIR, "assets")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Rendered scene segments, keyed by a hash of their inputs (see video_assembly.py)
+SEGMENT_CACHE_DIR = os.path.join(OUTPUT_DIR, "segments")
+os.makedirs(SEGMENT_CACHE_DIR, exist_ok=True)
+
+# Loudness-normalized music library and trimmed beds (see utils/audio_master.py)
+MUSIC_CACHE_DIR = os.path.join(OUTPUT_DIR, "music_cache")
+os.makedirs(MUSIC_CACHE_DIR, exist_ok=True)
+
+# Disk quota for assets/; intermediates of fully uploaded rows are evicted LRU (utils/asset_manager.py)
+ASSET_QUOTA_BYTES = int(float(os.getenv("ASSET_QUOTA_GB", "10")) * 1e9)
+
+# Centre-zoom implementation: "zoompan" (reference) or "scale_crop" (fast, see utils/motion.py and benchmarks/motion_bench.py)
+MOTION_ENGINE = os.getenv("MOTION_ENGINE", "zoompan")
+
+# Pre-render validation gate (nodes/validation.py): allowed VO vs alignment disagreement, smallest usable still
+VALIDATION_AV_TOLERANCE_MS = float(os.getenv("VALIDATION_AV_TOLERANCE_MS", "500"))
+VALIDATION_MIN_IMAGE_SIDE = int(os.getenv("VALIDATION_MIN_IMAGE_SIDE", "512"))
+
+# Final encode: a named profile from utils/encode_profiles.py, or "auto" to fit the time budget
+ENCODE_PROFILE = os.getenv("ENCODE_PROFILE", "default")
+ENCODE_TIME_BUDGET_S = float(os.getenv("ENCODE_TIME_BUDGET_S", "300"))
+
+# ffmpeg watchdog: kill an encode that stops advancing, or that runs past the hard deadline
+FFMPEG_STALL_TIMEOUT_S = float(os.getenv("FFMPEG_STALL_TIMEOUT_S", "120"))
+FFMPEG_DEADLINE_S = float(os.getenv("FFMPEG_DEADLINE_S", "1800"))
+
+# One deadline shared by the concurrent YouTube and Instagram uploads (incl. processing polls)
+UPLOAD_DEADLINE_S = float(os.getenv("UPLOAD_DEADLINE_S", "1200"))
+
+# Extra renditions encoded in the same ffmpeg run as the master, e.g. "insta,preview"
+RENDITIONS_ENABLED = [r.strip() for r in os.getenv("RENDITIONS", "").split(",") if r.strip()]
+
+# Logging (utils/logging_setup.py): JSON lines for the metrics tooling, or "text" for a terminal
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_FILE = os.getenv("LOG_FILE")
+
+# Opt-in node profiling (see utils/profiling.py): PROFILE_NODES="image_gen,video_assembly" or "all"
+PROFILE_NODES = [n.strip() for n in os.getenv("PROFILE_NODES", "").split(",") if n.strip()]
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")   # "sample" (collapsed stacks) or "cprofile" (+ .prof)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL_S = float(os.getenv("PROFILE_SAMPLE_INTERVAL_S", "0.005"))
+# Async nodes always report event-loop stalls longer than this (0 disables the watch)
+LOOP_LAG_WARN_S = float(os.getenv("LOOP_LAG_WARN_S", "0.25"))
+
+# Render farm mode (see utils/render_queue.py, workers/render_worker.py): "local" renders in-process,
+# "queue" hands video_assembly to render workers that share ASSETS_DIR and the queue file
+RENDER_MODE = os.getenv("RENDER_MODE", "local")
+RENDER_QUEUE_PATH = os.getenv("RENDER_QUEUE_PATH") or os.path.join(OUTPUT_DIR, "render_queue.sqlite")
+RENDER_JOB_TIMEOUT_S = float(os.getenv("RENDER_JOB_TIMEOUT_S", "3600"))
+RENDER_LEASE_S = float(os.getenv("RENDER_LEASE_S", "120"))       # a worker silent this long loses its job
+RENDER_MAX_ATTEMPTS = int(os.getenv("RENDER_MAX_ATTEMPTS", "2"))
+
+# SQLite ledger of every external API call: latency, retries, billed units, cost (see utils/ledger.py)
+LEDGER_PATH = os.getenv("LEDGER_PATH") or os.path.join(OUTPUT_DIR, "api_ledger.sqlite")
+
+# Idea queue prefetch (see utils/idea_queue.py): top up below the watermark, sized to cover N days of throughput
+IDEA_LOW_WATERMARK = int(os.getenv("IDEA_LOW_WATERMARK", "3"))
+IDEA_BATCH_MIN = int(os.getenv("IDEA_BATCH_MIN", "3"))
+IDEA_BATCH_MAX = int(os.getenv("IDEA_BATCH_MAX", "10"))
+IDEA_PREFETCH_DAYS = float(os.getenv("IDEA_PREFETCH_DAYS", "3"))
+
 IDEA_GENERATION_API_URL = (
     f"https://generativelanguage.googleapis.com/v1beta/models/"
     f"{IDEA_GENERATION_MODEL}:generateContent?key={GEMINI_API_KEY_1}"
@@ -52,6 +115,11 @@ CLAUDE_SCRIPT_IMAGE_PROMPT_URL = (
     f"https://api.anthropic.com/v1/messages"
 )
 
+# Imagen batching: scene prompts packed into one predict call, and candidates per scene (best kept).
+# Imagen 4 Ultra serves one image per request; raise these only with a model that accepts more.
+IMAGEN_PROMPTS_PER_REQUEST = max(1, int(os.getenv("IMAGEN_PROMPTS_PER_REQUEST", "1")))
+IMAGEN_SAMPLE_COUNT = min(4, max(1, int(os.getenv("IMAGEN_SAMPLE_COUNT", "1"))))
+
 IMAGEN_IMAGE_GENERATION_API_URL_1 = (
     f"https://generativelanguage.googleapis.com/v1beta/models/"
     f"{IMAGEN_MODEL}:predict?key={GEMINI_API_KEY_1}"
@@ -66,6 +134,29 @@ LUMA_VIDEO_GENERATION_API_URL = (
     f"https://api.lumalabs.ai/dream-machine/v1/generations"
 )
 
+# Localised variants muxed onto the already-rendered visual track, e.g. "es,pt,hi" (see nodes/variants.py)
+VARIANT_LANGUAGES = [l.strip() for l in os.getenv("VARIANT_LANGUAGES", "").split(",") if l.strip()]
+
+# Veo clip scenes (see nodes/video_gen.py): "" disables the stage, "all", or 1-based scene numbers e.g. "1,4"
+VEO_CLIP_SCENES = os.getenv("VEO_CLIP_SCENES", "").strip()
+VEO_CONCURRENCY = int(os.getenv("VEO_CONCURRENCY", "2"))
+VEO_BASE_URL = os.getenv("VEO_BASE_URL", "")   # e.g. http://localhost:8766 for benchmarks/fake_veo.py
+
+# Where rendered videos get their public URL: "git" (legacy push), "s3" or "local" (see utils/publisher.py)
+ASSET_PUBLISHER = os.getenv("ASSET_PUBLISHER", "git")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "")          # e.g. http://localhost:9000 for MinIO
+S3_BUCKET = os.getenv("S3_BUCKET", "zeteon-assets")
+S3_PREFIX = os.getenv("S3_PREFIX", "videos/")
+S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL", "")
+PUBLISH_DIR = os.getenv("PUBLISH_DIR", os.path.join(BASE_DIR, "published"))
+PUBLISH_HOST = os.getenv("PUBLISH_HOST", "0.0.0.0")
+PUBLISH_PORT = int(os.getenv("PUBLISH_PORT", "8765"))
+# "local": Meta's servers fetch the video, so PUBLIC_BASE_URL must be publicly reachable (never localhost), and the
+# server must outlive every upload that pulls from it: run `python -m utils.publisher` as its own long-lived process.
+# PUBLISH_AUTOSTART=true serves from a daemon thread inside the pipeline instead, which stops when the run exits.
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
+PUBLISH_AUTOSTART = os.getenv("PUBLISH_AUTOSTART", "false").lower() == "true"
+
 GITHUB_RAW_BASE = (
     f"https://raw.githubusercontent.com/polarityreverse/doc-assets/master/output_assets/"
 )
@@ -1,151 +1,55 @@
-import os
-import sys
 import logging
-import random
-import json
 import asyncio
-import datetime
-import time
 import traceback
-from typing import List
 
 # LangGraph Imports
 from langgraph.graph import StateGraph, END
 
 # Project Imports
 from utils.schema import flowstate
-from utils.sheets import get_worksheet
-from utils.youtube_view_count import get_performance_context
-from config import IDEA_GENERATION_API_URL, IDEA_SYSTEM_INSTRUCTIONS
+from utils.idea_queue import get_ready_idea
+from utils import ledger, profiling
+from utils.logging_setup import setup_logging, with_node
+from utils.publisher import get_publisher
+from config import VARIANT_LANGUAGES, VEO_CLIP_SCENES
 
 # Node Imports
 from nodes.script_gen import script_generation
 from nodes.audio_gen import audio_generation
 from nodes.image_gen import image_generation
+from nodes.video_gen import video_generation
+from nodes.validation import validate_render_inputs
 from nodes.video_assembly import video_stitching_slideshow
+from nodes.variants import language_variants
 from nodes.final_upload import video_upload_node
+from nodes.metadata_gen import start_speculative_metadata
 
-# --- LOGGING CONFIGURATION (AWS READY) ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# --- LOGGING CONFIGURATION (AWS READY: JSON lines via a background queue listener) ---
+setup_logging()
 logger = logging.getLogger("ZeteonPipeline")
 
-# --- IDEA MANAGEMENT ---
-
-def get_ready_idea(sheet_name="ideas"):
-    """Fetches a pending idea or triggers generation of new ones."""
-    try:
-        worksheet = get_worksheet(sheet_name)
-        all_records = worksheet.get_all_values()
-        if not all_records: return None
-
-        headers = all_records[0]
-        data = all_records[1:]
-
-        # Mapping headers to indices
-        idx_map = {header: i for i, header in enumerate(headers)}
-        idx_trigger = idx_map.get('Trigger Status')
-        idx_idea = idx_map.get('Idea')
-
-        pending_ideas = []
-        uploaded_ideas = []
-
-        for i, row in enumerate(data):
-            sheet_row = i + 2 
-            
-            # Check if row needs processing
-            trigger_status = row[idx_trigger].strip().upper() if len(row) > idx_trigger else ""
-            
-            needs_upload = trigger_status!='TRIGGERED'
-
-            if needs_upload:
-                pending_ideas.append((sheet_row, row))
-            else:
-                uploaded_ideas.append(row[idx_idea])
-
-        if not pending_ideas:
-            logger.info("Empty queue. Generating 3 new 'What Happens When' ideas...")
-            new_ideas = generate_3_ideas(uploaded_ideas)
-            
-            today = datetime.date.today().strftime("%Y-%m-%d")
-            ideas_to_add = [[today, idea, '', '', 'NOT-UPLOADED', '', 'NOT-UPLOADED', '', ''] for idea in new_ideas]
-            
-            if ideas_to_add:
-                worksheet.append_rows(ideas_to_add)
-                logger.info(f"✅ Added {len(ideas_to_add)} ideas to Sheet.")
-                return get_ready_idea(sheet_name)
-
-        row_num, chosen_row = random.choice(pending_ideas)
-        logger.info(f"🎯 Target Idea: {chosen_row[idx_idea]} | Row: {row_num}")
-        worksheet.update_cell(row_num, 10, 'TRIGGERED')
-        return {"row_index": row_num, "idea": chosen_row[idx_idea]}
-
-    except Exception as e:
-        logger.error(f"Error in get_ready_idea: {str(e)}")
-        return None
-
-def generate_3_ideas(uploaded_ideas: List) -> List:
-    """LLM call to generate next viral science topics."""
-    performance_data = get_performance_context()
-    
-    prompt = f"""
-You are the Zeteon Science Lead.
-Your job is to propose three **viral, curiosity‑driven science explainer topics** optimized for short‑form video platforms.
-
-Use the following performance context to understand what resonates:
-{performance_data}
-
-Avoid repeating or overlapping with these previously uploaded ideas:
-{uploaded_ideas}
-
-Return only valid JSON that matches this structure:
-
-{{
-  "ideas": ["string", "string", ...]
-}}
-"""
-    
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "systemInstruction": {"parts": [{"text": IDEA_SYSTEM_INSTRUCTIONS}]},
-        "generationConfig": {
-            "responseMimeType": "application/json",
-            "responseSchema": {
-                "type": "object",
-                "properties": {"ideas": {"type": "array", "items": {"type": "string"}}},
-                "required": ["ideas"]
-            }
-        }
-    }
-    
-    for attempt in range(3):
-        try:
-            import requests
-            resp = requests.post(IDEA_GENERATION_API_URL, json=payload, timeout=60)
-            resp.raise_for_status()
-            data = json.loads(resp.json()['candidates'][0]['content']['parts'][0]['text'])
-            return data.get('ideas', [])
-        except Exception as e:
-            logger.warning(f"Idea Gen Attempt {attempt+1} failed: {e}")
-            time.sleep(2)
-    return []
-
 # --- LANGGRAPH ORCHESTRATION ---
 
+def wrap_node(name, fn):
+    """Log context (node name + span id) outermost, so the profiler's and lag monitor's records carry it too."""
+    return with_node(name, profiling.wrap(name, fn))
+
 def build_workflow():
     """Constructs the LangGraph state machine."""
     workflow = StateGraph(flowstate)
 
     # Define Nodes
-    workflow.add_node("script_gen", script_generation)
-    workflow.add_node("audio_gen", audio_generation)
-    workflow.add_node("image_gen", image_generation)
-    workflow.add_node("video_assembly", video_stitching_slideshow)
-    workflow.add_node("final_upload", video_upload_node)
+    # Every record a node logs carries its name; profilers are added only when enabled (PROFILE_NODES / --profile)
+    workflow.add_node("script_gen", wrap_node("script_gen", script_generation))
+    workflow.add_node("audio_gen", wrap_node("audio_gen", audio_generation))
+    workflow.add_node("image_gen", wrap_node("image_gen", image_generation))
+    if VEO_CLIP_SCENES:
+        workflow.add_node("video_gen", wrap_node("video_gen", video_generation))
+    workflow.add_node("validate", wrap_node("validate", validate_render_inputs))
+    workflow.add_node("video_assembly", wrap_node("video_assembly", video_stitching_slideshow))
+    workflow.add_node("final_upload", wrap_node("final_upload", video_upload_node))
+    if VARIANT_LANGUAGES:
+        workflow.add_node("variants", wrap_node("variants", language_variants))
 
     # Define Conditional Edge Logic
     def should_continue(state):
@@ -161,21 +65,44 @@ def build_workflow():
     # Define Connections
     workflow.add_edge("script_gen", "audio_gen")
     workflow.add_edge("audio_gen", "image_gen")
-    workflow.add_edge("image_gen", "video_assembly")
-    workflow.add_edge("video_assembly", "final_upload")
+    if VEO_CLIP_SCENES:
+        workflow.add_edge("image_gen", "video_gen")
+        workflow.add_edge("video_gen", "validate")
+    else:
+        workflow.add_edge("image_gen", "validate")
+    # A rejected row ends here, before any CPU is spent on the render
+    workflow.add_conditional_edges(
+        "validate", lambda state: "video_assembly" if state.get("isrenderready") else END,
+        {"video_assembly": "video_assembly", END: END}
+    )
+    if VARIANT_LANGUAGES:
+        workflow.add_edge("video_assembly", "variants")
+        workflow.add_edge("variants", "final_upload")
+    else:
+        workflow.add_edge("video_assembly", "final_upload")
     workflow.add_edge("final_upload", END)
 
     return workflow.compile()
 
 async def main():
     logger.info("🚀 Starting Zeteon Production Pipeline")
-    
-    # 1. Fetch Job
-    initial_data = get_ready_idea()
+
+    # Fail before claiming a row if the configured publisher could never hand Instagram a reachable URL
+    try:
+        get_publisher()
+    except (ValueError, ImportError) as e:
+        logger.error(f"❌ Asset publisher misconfigured: {e}")
+        return
+
+    # 1. Fetch Job (a low queue is topped up on a background thread while this row renders)
+    initial_data, prefetch = get_ready_idea()
     if not initial_data:
         logger.error("No pending tasks found in Google Sheets.")
         return
 
+    # Every API call from here on is attributed to this row in the ledger
+    ledger.current_row.set(initial_data["row_index"])
+
     # 2. Initialize State
     state: flowstate = {
         "idea": initial_data["idea"],
@@ -188,12 +115,16 @@ async def main():
         "isscriptgenerated": False,
         "isvoicegenerated": False,
         "isimagesgenerated": False,
+        "isrenderready": False,
         "isvideogenerated": False,
         "isvideouploaded" : False,
         "topic_comment": "" # Will be populated by script_gen
     }
 
-    # 3. Run Graph
+    # 3. Speculative metadata (runs alongside the graph; the upload node picks it up)
+    start_speculative_metadata(initial_data["row_index"], initial_data["idea"])
+
+    # 4. Run Graph
     app = build_workflow()
     try:
         # Running the graph as an async stream or direct invoke
@@ -207,6 +138,16 @@ async def main():
     except Exception as e:
         logger.critical(f"💥 Unhandled exception in Main Graph: {str(e)}")
         logger.error(traceback.format_exc())
+    finally:
+        if prefetch is not None:
+            await asyncio.to_thread(prefetch.join)
 
 if __name__ == "__main__":
+    # Usage: python main.py [--profile image_gen,video_assembly|all] [--profile-mode sample|cprofile]
+    import argparse
+    parser = argparse.ArgumentParser(description="Zeteon production pipeline")
+    parser.add_argument("--profile", default=None, help="comma-separated node names to profile, or 'all'")
+    parser.add_argument("--profile-mode", choices=profiling.PROFILE_MODES, default=None)
+    args = parser.parse_args()
+    profiling.configure(args.profile, args.profile_mode)
     asyncio.run(main())
\ No newline at end of file
@@ -7,28 +7,117 @@ import time
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
-from config import ELEVENLABS_API_KEY, ELEVENLABS_VOICE_GENERATION_API_URL, OUTPUT_DIR, VOICE_IDS
+from utils import manifest, ledger
+from config import (
+    ELEVENLABS_API_KEY, ELEVENLABS_VOICE_GENERATION_API_URL, OUTPUT_DIR, VOICE_IDS, VALIDATION_AV_TOLERANCE_MS
+)
 
 # Configure logger for AWS CloudWatch
 logger = logging.getLogger(__name__)
-# basicConfig is assumed to be configured in main.py, 
-# but we use logger.info/error for consistency.
+# Handlers are configured once by the entry point (utils/logging_setup.py)
 
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=2, min=4, max=60),
     retry=retry_if_exception_type(requests.exceptions.HTTPError),
+    before=ledger.note_attempt,
     reraise=True
 )
 def call_elevenlabs_api(url: str, payload: dict, headers: dict):
     """Retries on 429 (Rate Limit) or 5xx errors automatically."""
-    response = requests.post(url, json=payload, headers=headers, timeout=90)
+    with ledger.track("elevenlabs", "with-timestamps", stage="voice", unit="characters", model=payload.get("model_id")) as call:
+        response = requests.post(url, json=payload, headers=headers, timeout=90)
+        call["status"] = response.status_code
+        
+        if response.status_code == 429:
+            logger.warning("🕒 ElevenLabs Rate Limit hit. Tenacity will backoff and retry...")
+        
+        response.raise_for_status()
+        call["units_in"] = len(payload["text"])  # billed per character, only when synthesis succeeds
+        return response.json()
+
+def voiceover_paths(row_id, language=None):
+    """VO + alignment paths; language variants get a suffix so they never clobber the primary take."""
+    suffix = f"_{language}" if language else ""
+    return (
+        os.path.join(OUTPUT_DIR, f"vo_row_{row_id}{suffix}.mp3"),
+        os.path.join(OUTPUT_DIR, f"alignment_row_{row_id}{suffix}.json"),
+    )
+
+def alignment_drift_ms(alignment, vo_duration):
+    """How far the alignment's last character ends from the end of the voiceover (+ = past it)."""
+    return (max(alignment["character_end_times_seconds"]) - vo_duration) * 1000
+
+def load_cached_voiceover(row_id, vo_path, alignment_path):
+    """
+    Alignment data if both files are manifest-verified (half-written files never count) and belong
+    together, else None. A mismatched pair is re-synthesised by the caller, which overwrites both.
+    """
+    row_manifest = manifest.load_manifest(row_id)
+    vo_entry = manifest.get_entry(row_id, vo_path, row_manifest, adopt=manifest.media_complete)
+    alignment_entry = manifest.get_entry(row_id, alignment_path, row_manifest, adopt=manifest.json_complete)
+    if not (vo_entry and alignment_entry):
+        return None
+    try:
+        with open(alignment_path, 'r') as f:
+            alignment = json.load(f)
+    except Exception as e:
+        logger.error(f"⚠️ Cache Corrupted for {os.path.basename(alignment_path)}, regenerating: {e}")
+        return None
+
+    if "pair" in alignment_entry:
+        if alignment_entry["pair"] == vo_entry["sha256"]:
+            return alignment
+        logger.warning(f"⚠️ {os.path.basename(alignment_path)} belongs to a different voiceover take, regenerating")
+        return None
+
+    # Pair cached before synthesis linked the two files: trust it only if the timings line up
+    try:
+        drift_ms = alignment_drift_ms(alignment, vo_entry["duration"])
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"⚠️ Cached alignment for Row {row_id} is unusable, regenerating: {e}")
+        return None
+    if abs(drift_ms) > VALIDATION_AV_TOLERANCE_MS:
+        logger.warning(f"⚠️ Cached alignment ends {drift_ms:+.0f} ms from its voiceover, regenerating the pair")
+        return None
+    return alignment
+
+def synthesize_voiceover(row_id, text, vo_path, alignment_path):
+    """ElevenLabs TTS with character timestamps; both files are written atomically and recorded."""
+    headers = {
+        "xi-api-key": ELEVENLABS_API_KEY,
+        "Content-Type": "application/json"
+    }
+    
+    VOICE_ID = random.choice(VOICE_IDS)
+    
+    vo_payload = {
+        "text": text,
+        "model_id": "eleven_multilingual_v2",
+        "voice_settings": {
+            "stability": 0.45,       # Pacing optimization
+            "similarity_boost": 0.8,
+            "style": 0.0,            # Preventing dramatic pauses
+            "use_speaker_boost": True
+        }
+    }
+
+    # Using the with-timestamps endpoint for word-level captioning
+    vo_url = f"{ELEVENLABS_VOICE_GENERATION_API_URL}/{VOICE_ID}/with-timestamps"
+    
+    # Execute API call with built-in retry logic
+    data = call_elevenlabs_api(vo_url, vo_payload, headers)
     
-    if response.status_code == 429:
-        logger.warning("🕒 ElevenLabs Rate Limit hit. Tenacity will backoff and retry...")
+    audio_bytes = base64.b64decode(data['audio_base64'])
     
-    response.raise_for_status()
-    return response.json()
+    # Save Audio (atomic; probed once here so later stages read the duration from the manifest)
+    manifest.atomic_write_bytes(vo_path, audio_bytes)
+    vo_entry = manifest.record(row_id, vo_path)
+
+    # Save Alignment (linked to this exact take, so a later cache hit can prove the two belong together)
+    manifest.atomic_write_json(alignment_path, data['alignment'])
+    manifest.record(row_id, alignment_path, pair=vo_entry["sha256"])
+    return data['alignment']
 
 def audio_generation(state: dict) -> dict:
     """Node 2: Optimized for Word-Level Alignment and Seamless Looping with Production-grade Logging."""
@@ -45,65 +134,28 @@ def audio_generation(state: dict) -> dict:
     logger.info(f"Starting Audio Generation for Row {row_id}", extra=log_extra)
     
     # Define File Paths
-    final_vo_path = os.path.join(OUTPUT_DIR, f"vo_row_{row_id}.mp3")
-    alignment_filename = os.path.join(OUTPUT_DIR, f"alignment_row_{row_id}.json")
+    final_vo_path, alignment_filename = voiceover_paths(row_id)
 
     # --- 1. CACHE CHECK ---
-    if os.path.exists(final_vo_path) and os.path.exists(alignment_filename):
+    cached_alignment = load_cached_voiceover(row_id, final_vo_path, alignment_filename)
+    if cached_alignment is not None:
         logger.info(f"📦 Cache Hit: Loading audio and alignment for Row {row_id}...")
-        try:
-            with open(alignment_filename, 'r') as f:
-                state["alignment_data"] = json.load(f)
-            state["vo_path"] = final_vo_path
-            state["isvoicegenerated"] = True
-            return state
-        except Exception as e:
-            logger.error(f"⚠️ Cache Corrupted for Row {row_id}, regenerating: {e}")
+        state["alignment_data"] = cached_alignment
+        state["vo_path"] = final_vo_path
+        state["isvoicegenerated"] = True
+        return state
 
     # --- 2. PREPARE TEXT FOR SEAMLESS LOOP ---
     try:
         scenes = script_data['scenes']
         full_vo_text = " ".join([scene['Voiceover_English'].strip() for scene in scenes])
 
-        # --- 3. API CONFIGURATION ---
-        headers = {
-            "xi-api-key": ELEVENLABS_API_KEY,
-            "Content-Type": "application/json"
-        }
-        
-        VOICE_ID = random.choice(VOICE_IDS)
-        
-        vo_payload = {
-            "text": full_vo_text,
-            "model_id": "eleven_multilingual_v2",
-            "voice_settings": {
-                "stability": 0.45,       # Pacing optimization
-                "similarity_boost": 0.8,
-                "style": 0.0,            # Preventing dramatic pauses
-                "use_speaker_boost": True
-            }
-        }
-
-        # --- 4. API CALL WITH TIMESTAMPS ---
-        # Using the with-timestamps endpoint for word-level captioning
-        vo_url = f"{ELEVENLABS_VOICE_GENERATION_API_URL}/{VOICE_ID}/with-timestamps"
-        
-        # Execute API call with built-in retry logic
-        data = call_elevenlabs_api(vo_url, vo_payload, headers)
-        
-        audio_bytes = base64.b64decode(data['audio_base64'])
-        
-        # Save Audio
-        with open(final_vo_path, 'wb') as f:
-            f.write(audio_bytes)
-
-        # Save Alignment
-        with open(alignment_filename, 'w') as f:
-            json.dump(data['alignment'], f)
+        # --- 3. API CALL WITH TIMESTAMPS ---
+        alignment = synthesize_voiceover(row_id, full_vo_text, final_vo_path, alignment_filename)
         
-        # --- 5. UPDATE STATE FOR ASSEMBLY ---
+        # --- 4. UPDATE STATE FOR ASSEMBLY ---
         state["vo_path"] = final_vo_path
-        state["alignment_data"] = data['alignment']
+        state["alignment_data"] = alignment
         state["isvoicegenerated"] = True
         
         logger.info(f"✅ VO & Alignment successfully saved for Row {row_id}")
@@ -112,4 +164,4 @@ def audio_generation(state: dict) -> dict:
         logger.error(f"❌ VO Generation Failed for Row {row_id}: {str(e)}", exc_info=True)
         state["isvoicegenerated"] = False
     
-    return state
\ No newline at end of file
+    return state
@@ -1,85 +1,179 @@
 import os
 import json
 import time
+import asyncio
+import threading
 import requests
 import logging
 from googleapiclient.http import MediaFileUpload
-from google import genai
-from google.genai import types
+from googleapiclient.errors import HttpError
 
 from utils.schema import flowstate
 from utils.youtube_auth import get_youtube_client
+from utils.poller import poller, RemoteJobFailed
 from utils.sheets import get_worksheet
+from utils import asset_manager, ledger, manifest
+from nodes.metadata_gen import resolve_metadata
 from config import (
-    OUTPUT_DIR, INSTA_ACCESS_TOKEN, INSTA_ACCOUNT_ID, 
-    GEMINI_API_KEY_1, VIDEO_METADATA_GENERATION_MODEL
+    OUTPUT_DIR, INSTA_ACCESS_TOKEN, INSTA_ACCOUNT_ID, UPLOAD_DEADLINE_S
 )
 
 # Set up production logging
 logger = logging.getLogger(__name__)
 
-# --- HELPER 1: Metadata Generator ---
-def get_llm_metadata(topic):
-    """Generates viral metadata with CTA, Pausing, and User Engagement focus."""
-    client = genai.Client(api_key=GEMINI_API_KEY_1)
-    
-    prompt = f"""
-Act as a Senior YouTube Strategist for 'Zeteon'.
-Topic: '{topic}'
-
-YOUR TASK:
-1. Create a high-retention title including #Shorts.
-2. The description must include a clear Call to Action (CTA).
-3. The pinned_comment must be a 'pausing' prompt—a surprising fact or question that encourages a reply.
-4. Instagram caption must be punchy and optimized for Reels.
-
-STRICT OUTPUT FORMAT:
-Return ONLY a JSON object. No markdown, no explanations.
-
-REQUIRED JSON STRUCTURE:
-{{
-    "youtube": {{
-        "title": "string",
-        "description": "string",
-        "tags": ["#tag1", "#tag2"],
-        "pinned_comment": "string"
-    }},
-    "insta": {{
-        "caption": "string",
-        "hashtags": ["#tag1", "#tag2"]
-    }}
-}}
-"""
+YT_PROCESSING_TIMEOUT_S = 15 * 45
+INSTA_PROCESSING_TIMEOUT_S = 45 * 20
 
-    try:
-        response = client.models.generate_content(
-            model=VIDEO_METADATA_GENERATION_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.2,
-            )
+# Resumable upload tuning: chunks are multiples of 256 KiB, sized to take ~TARGET_CHUNK_S each
+CHUNK_UNIT = 256 * 1024
+MIN_CHUNK, MAX_CHUNK = 4 * CHUNK_UNIT, 256 * CHUNK_UNIT
+TARGET_CHUNK_S = 8
+
+# --- SHARED POLLER HOOKS (one batched status query per platform for every pending row) ---
+GRAPH_API_URL = "https://graph.facebook.com/v19.0"
+
+async def check_youtube_processing(video_ids):
+    """Batched processingDetails lookup: up to 50 comma-joined IDs per videos().list call."""
+    youtube = await asyncio.to_thread(get_youtube_client)
+    with ledger.track("youtube", "videos.list", stage="upload", unit="quota", units_in=ledger.YOUTUBE_QUOTA["videos.list"]):
+        res = await asyncio.to_thread(
+            youtube.videos().list(part="processingDetails", id=",".join(video_ids), maxResults=50).execute
         )
-        
-        data = json.loads(response.text.strip())
-        if isinstance(data, list): data = data[0]
+    by_id = {item["id"]: item.get("processingDetails", {}) for item in res.get("items", [])}
+    results = []
+    for video_id in video_ids:
+        if video_id not in by_id:
+            results.append(("done", None))  # not visible yet/anymore: same as the old loop, stop waiting
+            continue
+        status = by_id[video_id].get("processingStatus")
+        if status == "succeeded":
+            results.append(("done", status))
+        elif status in ("failed", "terminated"):
+            results.append(("error", by_id[video_id].get("processingFailureReason", status)))
+        else:
+            results.append(("pending", status))
+    return results
 
-        if 'youtube' in data and 'insta' in data:
-            logger.info(f"✅ Metadata successfully generated for: {topic}")
-            return data
+async def check_insta_containers(container_ids):
+    """Batched container status via the Graph API multi-ID lookup (?ids=a,b)."""
+    # Request ONLY status_code first to avoid ShadowIGMediaBuilder field errors
+    with ledger.track("instagram", "container.status", stage="upload") as call:
+        resp = await asyncio.to_thread(
+            requests.get, f"{GRAPH_API_URL}/",
+            params={'ids': ",".join(container_ids), 'fields': 'status_code', 'access_token': INSTA_ACCESS_TOKEN},
+            timeout=30
+        )
+        call["status"] = resp.status_code
+    res = resp.json()
+    results = []
+    for container_id in container_ids:
+        s_code = res.get(container_id, {}).get('status_code')
+        if s_code == 'FINISHED':
+            results.append(("done", s_code))
+        elif s_code == 'ERROR':
+            # Only ask for error_message if we know an error exists
+            with ledger.track("instagram", "container.error", stage="upload") as call:
+                resp = await asyncio.to_thread(
+                    requests.get, f"{GRAPH_API_URL}/{container_id}",
+                    params={'fields': 'error_message', 'access_token': INSTA_ACCESS_TOKEN},
+                    timeout=30
+                )
+                call["status"] = resp.status_code
+            err_data = resp.json()
+            results.append(("error", err_data.get('error_message')))
         else:
-            logger.error(f"❌ LLM Schema Drift: {list(data.keys())}")
-            return None
+            results.append(("pending", s_code))
+    return results
 
-    except Exception as e:
-        logger.error(f"❌ Metadata Gen Error: {str(e)}")
-        return None
+poller.register_platform("youtube", check_youtube_processing, schedule=[30, 45, 60, 90, 120], max_batch=50)
+poller.register_platform("insta", check_insta_containers, schedule=[15, 20, 30, 45, 60], max_batch=50)
+
+# --- HELPER 1: Crash-resumable YouTube transfer ---
+def _upload_fingerprint(video_path):
+    st = os.stat(video_path)
+    return {"path": os.path.abspath(video_path), "size": st.st_size, "mtime": int(st.st_mtime)}
+
+def _resume_supported(request, media):
+    """Resume and adaptive chunking set googleapiclient privates; a release without them gets plain uploads."""
+    return hasattr(request, "_in_error_state") and hasattr(media, "_chunksize")
+
+def _load_upload_state(state_path):
+    try:
+        with open(state_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable YouTube upload state, starting fresh: {e}")
+        return {}
+
+class UploadStopped(Exception):
+    """The upload thread saw its stop flag between chunks; the saved session lets the next run resume."""
+
+def run_resumable_upload(request, media, video_path, state_path, stop=None):
+    """
+    Sends the file chunk by chunk, persisting the session URI + byte offset after every chunk
+    so a crashed or retried run resumes in place. Chunk size follows measured throughput.
+    `stop` (a threading.Event) is checked between chunks: worker threads cannot be cancelled.
+    """
+    fingerprint = _upload_fingerprint(video_path)
+    resumable = _resume_supported(request, media)
+    if not resumable:
+        logger.warning("⚠️ googleapiclient no longer exposes the resume internals; uploading from scratch.")
+    if resumable and os.path.exists(state_path):
+        saved = _load_upload_state(state_path)
+        if saved.get("file") == fingerprint and saved.get("resumable_uri"):
+            request.resumable_uri = saved["resumable_uri"]
+            request.resumable_progress = saved.get("progress", 0)
+            request._in_error_state = True  # first next_chunk() asks YouTube for the committed offset
+            media._chunksize = saved.get("chunksize", media.chunksize())
+            logger.info(f"♻️ Resuming YouTube upload at {request.resumable_progress / 1e6:.1f} MB")
+
+    response = None
+    while response is None:
+        if stop is not None and stop.is_set():
+            raise UploadStopped(f"stopped at {request.resumable_progress / 1e6:.1f} MB")
+        before, started = request.resumable_progress, time.monotonic()
+        try:
+            status, response = request.next_chunk(num_retries=3)
+        except HttpError as e:
+            if resumable and e.resp.status in (404, 410) and request.resumable_uri:
+                # Session expired server-side: start a fresh one
+                logger.warning("⚠️ Saved YouTube upload session expired, restarting upload.")
+                request.resumable_uri, request.resumable_progress, request._in_error_state = None, 0, False
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                continue
+            raise
+        if response is not None:
+            break
+
+        elapsed = max(time.monotonic() - started, 1e-3)
+        sent = request.resumable_progress - before
+        if resumable and sent > 0:
+            target = int(sent / elapsed * TARGET_CHUNK_S) // CHUNK_UNIT * CHUNK_UNIT
+            media._chunksize = min(MAX_CHUNK, max(MIN_CHUNK, target))
+
+        if resumable:
+            manifest.atomic_write_json(state_path, {
+                "file": fingerprint,
+                "resumable_uri": request.resumable_uri,
+                "progress": request.resumable_progress,
+                "chunksize": media.chunksize(),
+            })
+        if status:
+            logger.info(
+                f"📤 YouTube upload {status.progress() * 100:.0f}% "
+                f"({sent / elapsed / 1e6:.1f} MB/s, next chunk {media.chunksize() // CHUNK_UNIT * 256} KiB)"
+            )
+
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return response
 
 # --- HELPER 2: YouTube Uploader ---
-def upload_to_youtube(video_path, metadata, row_idx):
-    """Uploads to YouTube and handles engagement pinning."""
+async def upload_to_youtube(video_path, metadata, row_idx):
+    """Uploads to YouTube and handles engagement pinning (blocking calls run in worker threads)."""
     try:
-        youtube = get_youtube_client()
+        youtube = await asyncio.to_thread(get_youtube_client)
         
         body = {
             'snippet': {
@@ -91,34 +185,48 @@ def upload_to_youtube(video_path, metadata, row_idx):
             'status': {'privacyStatus': 'public', 'selfDeclaredMadeForKids': False}
         }
         
-        media = MediaFileUpload(video_path, chunksize=1024*1024, resumable=True)
+        media = MediaFileUpload(video_path, chunksize=MIN_CHUNK, resumable=True)
         request = youtube.videos().insert(part="snippet,status", body=body, media_body=media)
-        response = request.execute()
+        state_path = os.path.join(OUTPUT_DIR, f"yt_upload_row_{row_idx}.json")
+        stop = threading.Event()
+        with ledger.track(
+            "youtube", "videos.insert", stage="upload", row_id=row_idx, unit="quota",
+            units_in=ledger.YOUTUBE_QUOTA["videos.insert"]
+        ):
+            try:
+                response = await asyncio.to_thread(run_resumable_upload, request, media, video_path, state_path, stop)
+            except asyncio.CancelledError:
+                stop.set()  # the thread finishes its current chunk, then stops
+                raise
         
         video_id = response['id']
         video_url = f"https://www.youtube.com/shorts/{video_id}"
         logger.info(f"🎬 YouTube Uploaded: {video_url}")
 
-        # Wait for Processing
-        for _ in range(15): 
-            time.sleep(45)
-            status_res = youtube.videos().list(part="processingDetails", id=video_id).execute()
-            items = status_res.get("items", [])
-            if not items: break
-            if items[0].get("processingDetails", {}).get("processingStatus") == "succeeded":
-                logger.info("✅ YouTube: Processing complete.")
-                break
+        # Wait for Processing (shared poller; the Instagram task keeps running meanwhile)
+        try:
+            await poller.wait("youtube", video_id, timeout=YT_PROCESSING_TIMEOUT_S, label=f"row {row_idx}")
+            logger.info("✅ YouTube: Processing complete.")
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ YouTube: still processing after {YT_PROCESSING_TIMEOUT_S}s, pinning comment anyway.")
+        except RemoteJobFailed as e:
+            logger.error(f"❌ YouTube processing failed: {e}")
+            return "FAILED", None
         
         # Add Pinned Engagement Comment
-        youtube.commentThreads().insert(
-            part="snippet",
-            body={
-                "snippet": {
-                    "videoId": video_id,
-                    "topLevelComment": {"snippet": {"textOriginal": metadata['pinned_comment']}}
+        with ledger.track(
+            "youtube", "commentThreads.insert", stage="upload", row_id=row_idx, unit="quota",
+            units_in=ledger.YOUTUBE_QUOTA["commentThreads.insert"]
+        ):
+            await asyncio.to_thread(youtube.commentThreads().insert(
+                part="snippet",
+                body={
+                    "snippet": {
+                        "videoId": video_id,
+                        "topLevelComment": {"snippet": {"textOriginal": metadata['pinned_comment']}}
+                    }
                 }
-            }
-        ).execute()
+            ).execute)
         
         return "SUCCESS", video_url
     except Exception as e:
@@ -126,19 +234,21 @@ def upload_to_youtube(video_path, metadata, row_idx):
         return "FAILED", None
 
 # --- HELPER 3: Instagram Uploader (FINAL ROBUST VERSION) ---
-def upload_to_insta(video_url, metadata):
+async def upload_to_insta(video_url, metadata):
     """Uploads to Instagram with a staged polling to handle ShadowIGMediaBuilder errors."""
-    base_url = f"https://graph.facebook.com/v19.0/{INSTA_ACCOUNT_ID}"
+    base_url = f"{GRAPH_API_URL}/{INSTA_ACCOUNT_ID}"
     caption = f"{metadata['caption']}\n\n{' '.join(metadata['hashtags'])}"
     
     try:
         # Step 1: Create Container
-        res = requests.post(f"{base_url}/media", data={
-            'video_url': video_url, 
-            'caption': caption,
-            'media_type': 'REELS', 
-            'access_token': INSTA_ACCESS_TOKEN
-        }, timeout=60)
+        with ledger.track("instagram", "media", stage="upload") as call:
+            res = await asyncio.to_thread(requests.post, f"{base_url}/media", data={
+                'video_url': video_url, 
+                'caption': caption,
+                'media_type': 'REELS', 
+                'access_token': INSTA_ACCESS_TOKEN
+            }, timeout=60)
+            call["status"] = res.status_code
         
         container_data = res.json()
         container_id = container_data.get('id')
@@ -147,102 +257,115 @@ def upload_to_insta(video_url, metadata):
             logger.error(f"❌ Container ID missing: {container_data}")
             return "FAILED"
 
-        # Step 2: Staged Polling
-        for i in range(45):
-            time.sleep(20)
-            
-            # Request ONLY status_code first to avoid ShadowIGMediaBuilder field errors
-            status_res = requests.get(
-                f"https://graph.facebook.com/v19.0/{container_id}", 
-                params={'fields': 'status_code', 'access_token': INSTA_ACCESS_TOKEN}
-            ).json()
-            
-            s_code = status_res.get('status_code')
-            
-            if s_code is None:
-                logger.info(f"⏳ Attempt {i+1}/45: Container initializing...")
-                continue
-                
-            logger.info(f"⏳ Attempt {i+1}/45: Meta Status is '{s_code}'") 
-
-            if s_code == 'FINISHED':
-                publish_res = requests.post(
-                    f"{base_url}/media_publish", 
-                    data={'creation_id': container_id, 'access_token': INSTA_ACCESS_TOKEN}
-                ).json()
-                
-                if "id" in publish_res:
-                    logger.info("✅ Instagram Reel Published Successfully!")
-                    return "SUCCESS"
-                else:
-                    logger.error(f"❌ Publish failed: {publish_res}")
-                    return "FAILED"
-            
-            elif s_code == 'ERROR':
-                # Only ask for error_message if we know an error exists
-                err_data = requests.get(
-                    f"https://graph.facebook.com/v19.0/{container_id}", 
-                    params={'fields': 'error_message', 'access_token': INSTA_ACCESS_TOKEN}
-                ).json()
-                logger.error(f"❌ Meta Error: {err_data.get('error_message')}")
-                return "FAILED"
-
-        logger.error("🚨 Instagram Processing Timed Out after 15 minutes.")
-        return "FAILED"
+        # Step 2: Staged Polling (shared poller, batched across rows)
+        try:
+            await poller.wait("insta", container_id, timeout=INSTA_PROCESSING_TIMEOUT_S, label=container_id)
+        except asyncio.TimeoutError:
+            logger.error("🚨 Instagram Processing Timed Out after 15 minutes.")
+            return "FAILED"
+        except RemoteJobFailed as e:
+            logger.error(f"❌ Meta Error: {e}")
+            return "FAILED"
+
+        with ledger.track("instagram", "media_publish", stage="upload") as call:
+            resp = await asyncio.to_thread(
+                requests.post,
+                f"{base_url}/media_publish", 
+                data={'creation_id': container_id, 'access_token': INSTA_ACCESS_TOKEN},
+                timeout=60
+            )
+            call["status"] = resp.status_code
+        publish_res = resp.json()
+        
+        if "id" in publish_res:
+            logger.info("✅ Instagram Reel Published Successfully!")
+            return "SUCCESS"
+        else:
+            logger.error(f"❌ Publish failed: {publish_res}")
+            return "FAILED"
     except Exception as e:
         logger.error(f"⚠️ Insta Exception: {e}")
         return "ERROR"
 
 # --- MAIN EXECUTION NODE ---
-def video_upload_node(state: flowstate) -> flowstate:
+def read_sync_status(worksheet, row_idx):
+    """(published video URL, YouTube status, Instagram status) from one read of the row (columns D, E, G)."""
+    row = worksheet.row_values(row_idx) + [None] * 7
+    return row[3] or None, row[4] or None, row[6] or None
+
+async def video_upload_node(state: flowstate) -> flowstate:
+    """Node 5: Uploads to YouTube and Instagram concurrently under one shared deadline."""
     row_idx = state['row_index']
     topic = state['idea']
     
     logger.info(f"🚀 Starting Zeteon Final Sync (Row {row_idx})")
 
     try:
-        worksheet = get_worksheet("ideas")
+        # Sheets calls are blocking HTTP: run them in worker threads like every other API call here
+        worksheet = await asyncio.to_thread(get_worksheet, "ideas")
         final_video_path = os.path.join(OUTPUT_DIR, f"Video_Row_{row_idx}.mp4")
-        github_video_uri = worksheet.cell(row_idx, 4).value 
-
-        youtube_status = worksheet.cell(row_idx, 5).value
-        insta_status = worksheet.cell(row_idx, 7).value
+        github_video_uri, youtube_status, insta_status = await asyncio.to_thread(read_sync_status, worksheet, row_idx)
 
         # Default to False
         state["isvideouploaded"] = False
 
         if youtube_status != "UPLOADED" or insta_status != "UPLOADED":
-            meta = get_llm_metadata(topic)
+            # Speculative metadata started with the run; reused from state/cache on retries
+            meta = state.get("metadata") or await resolve_metadata(row_idx, topic)
             if not meta: return state
+            state["metadata"] = meta
 
-            # 1. YouTube Step
-            if youtube_status != "UPLOADED":
-                status, yt_link = upload_to_youtube(final_video_path, meta['youtube'], row_idx)
+            # 1. YouTube Task
+            async def youtube_step():
+                status, yt_link = await upload_to_youtube(final_video_path, meta['youtube'], row_idx)
                 if status == "SUCCESS":
-                    worksheet.update_cell(row_idx, 5, "UPLOADED")
-                    worksheet.update_cell(row_idx, 6, json.dumps(meta['youtube']))
-                    worksheet.update_cell(row_idx, 9, yt_link)
-                    youtube_status = worksheet.cell(row_idx, 5).value
+                    await asyncio.to_thread(worksheet.update_cell, row_idx, 5, "UPLOADED")
+                    await asyncio.to_thread(worksheet.update_cell, row_idx, 6, json.dumps(meta['youtube']))
+                    await asyncio.to_thread(worksheet.update_cell, row_idx, 9, yt_link)
+                    await asyncio.to_thread(asset_manager.mark_uploaded, row_idx, "youtube")
+                return status
 
-                else:
-                    return state
+            # 2. Instagram Task (independent: Meta pulls the already-published raw URL)
+            async def insta_step():
+                status = await upload_to_insta(github_video_uri, meta['insta'])
+                if status == "SUCCESS":
+                    await asyncio.to_thread(worksheet.update_cell, row_idx, 7, "UPLOADED")
+                    await asyncio.to_thread(worksheet.update_cell, row_idx, 8, json.dumps(meta['insta']))
+                    await asyncio.to_thread(asset_manager.mark_uploaded, row_idx, "insta")
+                return status
 
-            # 2. Instagram Step
+            tasks = {}
+            if youtube_status != "UPLOADED":
+                tasks["youtube"] = asyncio.create_task(youtube_step())
             if insta_status != "UPLOADED":
-                if upload_to_insta(github_video_uri, meta['insta']) == "SUCCESS":
-                    worksheet.update_cell(row_idx, 7, "UPLOADED")
-                    worksheet.update_cell(row_idx, 8, json.dumps(meta['insta']))
-                    insta_status = worksheet.cell(row_idx, 7).value
+                tasks["insta"] = asyncio.create_task(insta_step())
+
+            started = time.monotonic()
+            done, pending = await asyncio.wait(tasks.values(), timeout=UPLOAD_DEADLINE_S)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for platform, task in tasks.items():
+                if task in pending:
+                    logger.warning(f"📡 {platform}: TIMED_OUT")
+                elif task.exception():
+                    logger.error(f"📡 {platform}: FAILED ({type(task.exception()).__name__}: {task.exception()})")
                 else:
-                    return state
+                    logger.info(f"📡 {platform}: {task.result()}")
+            logger.info(f"⏱️ Uploads settled in {time.monotonic() - started:.0f}s (deadline {UPLOAD_DEADLINE_S:.0f}s)")
 
         # Verification
-        if worksheet.cell(row_idx, 5).value == "UPLOADED" and worksheet.cell(row_idx, 7).value == "UPLOADED":
+        _, youtube_status, insta_status = await asyncio.to_thread(read_sync_status, worksheet, row_idx)
+        if youtube_status == "UPLOADED" and insta_status == "UPLOADED":
             state["isvideouploaded"] = True
             logger.info(f"✅ Row {row_idx} fully synchronized.")
+            for platform in asset_manager.PLATFORMS:
+                await asyncio.to_thread(asset_manager.mark_uploaded, row_idx, platform)
+            # Row is now evictable: keep assets/ within quota
+            await asyncio.to_thread(asset_manager.gc)
 
     except Exception as e:
         logger.error(f"Critical Node 5 Failure: {e}", exc_info=True)
         state["isvideouploaded"] = False
 
-    return state
\ No newline at end of file
+    return state
@@ -3,28 +3,45 @@ import aiohttp
 import random
 import base64
 import os
-import shutil
+import json
 import logging
-from typing import Optional
-from config import IMAGEN_IMAGE_GENERATION_API_URL_1, IMAGEN_IMAGE_GENERATION_API_URL_2, OUTPUT_DIR
+from typing import List, Optional, Tuple
+from utils import manifest, ledger
+from config import (
+    IMAGEN_IMAGE_GENERATION_API_URL_1, IMAGEN_IMAGE_GENERATION_API_URL_2, OUTPUT_DIR, IMAGEN_MODEL,
+    IMAGEN_PROMPTS_PER_REQUEST, IMAGEN_SAMPLE_COUNT
+)
 
 # Set up production logging
 logger = logging.getLogger(__name__)
 
-async def generate_single_image_async(
-    session: aiohttp.ClientSession, 
-    prompt: str, 
-    img_filename: str, 
+def decode_predictions(raw: bytes) -> List[bytes]:
+    """JSON parse + base64 decode of a predict response: several MB per image, so callers run it in a thread."""
+    predictions = json.loads(raw).get("predictions", [])
+    return [base64.b64decode(p["bytesBase64Encoded"]) for p in predictions if p.get("bytesBase64Encoded")]
+
+def pick_best(candidates: List[bytes]) -> bytes:
+    """
+    Cheap local pick among sampleCount candidates: the largest PNG. Compressed size tracks
+    detail, so flat, washed-out or mostly-empty frames lose without decoding any pixels.
+    """
+    return max(candidates, key=len)
+
+async def request_imagen(
+    session: aiohttp.ClientSession,
+    prompts: List[str],
+    sample_count: int = 1,
     retries_per_url: int = 3
-) -> Optional[str]:
+) -> Tuple[str, Optional[List[List[bytes]]]]:
     """
-    Advanced Worker for AWS Production.
+    One predict call for one or more prompts. Returns ("ok", candidates per prompt),
+    ("filtered", None) on a safety/prompt rejection, or ("failed", None) once both keys are exhausted.
     Exhausts all retries on URL_1 before switching to URL_2.
     """
     payload = {
-        "instances": [{"prompt": prompt}],
+        "instances": [{"prompt": prompt} for prompt in prompts],
         "parameters": {
-            "sampleCount": 1,
+            "sampleCount": sample_count,
             "aspectRatio": "9:16",
             "outputMimeType": "image/png"
         }
@@ -36,41 +53,105 @@ async def generate_single_image_async(
         key_label = f"Key {url_idx + 1}"
         
         for attempt in range(retries_per_url):
+            wait_time = 0
             try:
-                async with session.post(target_url, json=payload, timeout=90) as response:
-                    if response.status == 200:
-                        resp_data = await response.json()
-                        image_b64 = resp_data["predictions"][0]["bytesBase64Encoded"]
+                # Every attempt is billed separately in the ledger; backoff sleeps stay outside its timing
+                with ledger.track(
+                    "imagen", "predict", stage="images", api_key=key_label, unit="images",
+                    model=IMAGEN_MODEL, attempt=url_idx * retries_per_url + attempt + 1
+                ) as call:
+                    async with session.post(target_url, json=payload, timeout=90 + 30 * (len(prompts) * sample_count - 1)) as response:
+                        call["status"] = response.status
+                        if response.status == 200:
+                            # Parsing and decoding run off the loop so concurrent downloads keep flowing
+                            images = await asyncio.to_thread(decode_predictions, await response.read())
+                            call["units_out"] = len(images)
+
+                            # Predictions come back in instance order; filtered samples are dropped,
+                            # so a multi-prompt response can only be split when nothing is missing
+                            if len(prompts) == 1 and images:
+                                return "ok", [images]
+                            if len(images) == len(prompts) * sample_count:
+                                return "ok", [images[i * sample_count:(i + 1) * sample_count] for i in range(len(prompts))]
+                            logger.warning(f"⚠️ {key_label} returned {len(images)} images for {len(prompts)}x{sample_count}.")
+                            return "filtered", None
                         
-                        with open(img_filename, "wb") as f:
-                            f.write(base64.b64decode(image_b64))
-                        return img_filename
-                    
-                    elif response.status == 429:
-                        wait_time = (2 ** attempt) * 8 + (random.uniform(0, 2))
-                        logger.warning(
-                            f"🕒 {key_label} Rate Limited (429). "
-                            f"Attempt {attempt+1}/{retries_per_url}. Retrying in {wait_time:.1f}s..."
-                        )
-                        await asyncio.sleep(wait_time)
-                    
-                    elif response.status == 400:
-                        logger.error(f"⚠️ Safety/Prompt Filter Triggered on {key_label}. Skipping scene.")
-                        return None
-                    
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"⚠️ {key_label} API Error {response.status}: {error_text}")
+                        elif response.status == 429:
+                            wait_time = (2 ** attempt) * 8 + (random.uniform(0, 2))
+                            logger.warning(
+                                f"🕒 {key_label} Rate Limited (429). "
+                                f"Attempt {attempt+1}/{retries_per_url}. Retrying in {wait_time:.1f}s..."
+                            )
+                        
+                        elif response.status == 400:
+                            error_text = await response.text()
+                            call["error"] = error_text
+                            logger.error(f"⚠️ Safety/Prompt Filter Triggered on {key_label}: {error_text[:200]}")
+                            return "filtered", None
+                        
+                        else:
+                            error_text = await response.text()
+                            call["error"] = error_text
+                            logger.error(f"⚠️ {key_label} API Error {response.status}: {error_text}")
                         
             except Exception as e:
                 logger.error(f"❌ {key_label} Async Request Failed: {str(e)}")
-                await asyncio.sleep(5)
+                wait_time = 5
+            if wait_time:
+                await asyncio.sleep(wait_time)
         
         # If we finished the inner loop and didn't return, URL_1 is likely exhausted
         if url_idx == 0:
             logger.error(f"🚨 {key_label} fully exhausted or persistently limited. Switching to URL 2...")
 
-    return None
+    return "failed", None
+
+async def generate_single_image_async(
+    session: aiohttp.ClientSession, 
+    prompt: str, 
+    img_filename: str, 
+    retries_per_url: int = 3,
+    sample_count: int = IMAGEN_SAMPLE_COUNT
+) -> Optional[str]:
+    """Advanced Worker for AWS Production: one prompt, best of sample_count candidates."""
+    status, groups = await request_imagen(session, [prompt], sample_count, retries_per_url)
+    if status != "ok":
+        if status == "filtered":
+            logger.error(f"⚠️ No usable image for {os.path.basename(img_filename)}. Skipping scene.")
+        return None
+    await asyncio.to_thread(manifest.atomic_write_bytes, img_filename, pick_best(groups[0]))
+    return img_filename
+
+async def generate_image_batch_async(
+    session: aiohttp.ClientSession,
+    jobs: List[Tuple[str, str]],
+    sample_count: int = IMAGEN_SAMPLE_COUNT
+) -> List[Optional[str]]:
+    """
+    Several (prompt, filename) jobs in one predict call. If the batch is rejected or cannot be
+    split back per prompt, each prompt is retried on its own so one bad prompt only costs its scene.
+    """
+    if len(jobs) == 1:
+        return [await generate_single_image_async(session, jobs[0][0], jobs[0][1], sample_count=sample_count)]
+
+    status, groups = await request_imagen(session, [prompt for prompt, _ in jobs], sample_count)
+    if status == "ok":
+        for (_, img_filename), candidates in zip(jobs, groups):
+            await asyncio.to_thread(manifest.atomic_write_bytes, img_filename, pick_best(candidates))
+        return [img_filename for _, img_filename in jobs]
+    if status == "failed":
+        return [None] * len(jobs)
+
+    logger.warning(f"↩️ Batch of {len(jobs)} prompts rejected; retrying them one by one.")
+    return [
+        await generate_single_image_async(session, prompt, img_filename, sample_count=sample_count)
+        for prompt, img_filename in jobs
+    ]
+
+def copy_scene(row_id, src, dst):
+    """Fallback still: a neighbouring scene's image, copied and recorded (run in a worker thread)."""
+    manifest.atomic_copy(src, dst)
+    manifest.record(row_id, dst)
 
 async def image_generation(state: dict) -> dict:
     """Node 3: Generates images using text-based consistency and concurrent workers."""
@@ -95,41 +176,59 @@ async def image_generation(state: dict) -> dict:
     
     semaphore = asyncio.Semaphore(2) 
 
-    async def throttled_gen(session, prompt, img_filename, idx):
+    async def throttled_gen(session, jobs):
         async with semaphore:
-            full_prompt = f"{prompt}{style_suffix}"
-            result = await generate_single_image_async(session, full_prompt, img_filename)
-            await asyncio.sleep(1.5) # Grace period for API stability
-            return result
+            results = await generate_image_batch_async(session, jobs)
+            for res in results:
+                if res:
+                    await asyncio.to_thread(manifest.record, row_id, res)  # sha256 of a multi-MB PNG
+            await asyncio.sleep(1.5) # Grace period for API stability (once per request, not per scene)
+            return results
+
+    def scan_cache():
+        # Logic for Cache Handling (manifest-verified; pre-manifest PNGs must end in IEND)
+        row_manifest = manifest.load_manifest(row_id)
+        return [
+            manifest.is_valid(row_id, os.path.join(OUTPUT_DIR, f"row_{row_id}_scene_{i+1}.png"), row_manifest, adopt=manifest.png_complete)
+            for i in range(len(scenes))
+        ]
+
+    # Hashing cached PNGs is file I/O: keep it off the event loop
+    cache_hits = await asyncio.to_thread(scan_cache)
 
     async with aiohttp.ClientSession() as session:
-        tasks = []
-        task_indices = []
+        pending = []
         
         for i, scene in enumerate(scenes):
             img_filename = os.path.join(OUTPUT_DIR, f"row_{row_id}_scene_{i+1}.png")
             
-            # Logic for Cache Handling
-            if os.path.exists(img_filename):
+            if cache_hits[i]:
                 state["image_paths"][i] = img_filename
                 logger.info(f"📦 Cache Hit: Scene {i+1} found.")
                 continue
             
             prompt = scene.get("Image_Action_Prompt") or scene.get("Video_Action_Prompt")
-            task = asyncio.create_task(throttled_gen(session, prompt, img_filename, i))
-            tasks.append(task)
-            task_indices.append(i)
+            pending.append((i, f"{prompt}{style_suffix}", img_filename))
 
-        if tasks:
-            logger.info(f"🖼️ Dispatching {len(tasks)} concurrent image requests...")
+        # Up to IMAGEN_PROMPTS_PER_REQUEST scenes share one predict call
+        batches = [pending[n:n + IMAGEN_PROMPTS_PER_REQUEST] for n in range(0, len(pending), IMAGEN_PROMPTS_PER_REQUEST)]
+        if batches:
+            logger.info(
+                f"🖼️ Dispatching {len(pending)} scenes in {len(batches)} concurrent image requests "
+                f"({IMAGEN_SAMPLE_COUNT} candidate(s) per scene)..."
+            )
+            tasks = [
+                asyncio.create_task(throttled_gen(session, [(prompt, filename) for _, prompt, filename in batch]))
+                for batch in batches
+            ]
             results = await asyncio.gather(*tasks)
             
-            for idx_in_tasks, res in enumerate(results):
-                original_scene_idx = task_indices[idx_in_tasks]
-                if res: 
-                    state["image_paths"][original_scene_idx] = res
+            for batch, batch_results in zip(batches, results):
+                for (original_scene_idx, _, _), res in zip(batch, batch_results):
+                    if res: 
+                        state["image_paths"][original_scene_idx] = res
 
-    # Fallback Logic (shutil.copy)
+    # Fallback Logic (copy a neighbouring scene)
     missing = [i for i, path in enumerate(state["image_paths"]) if path is None]
     if missing:
         logger.warning(f"⚠️ Missing {len(missing)} images. Applying fallback...")
@@ -137,12 +236,12 @@ async def image_generation(state: dict) -> dict:
             if i > 0 and state["image_paths"][i-1]:
                 src = state["image_paths"][i-1]
                 dst = os.path.join(OUTPUT_DIR, f"row_{row_id}_scene_{i+1}.png")
-                shutil.copy(src, dst)
+                await asyncio.to_thread(copy_scene, row_id, src, dst)
                 state["image_paths"][i] = dst
             elif i < len(state["image_paths"]) - 1 and state["image_paths"][i+1]:
                 src = state["image_paths"][i+1]
                 dst = os.path.join(OUTPUT_DIR, f"row_{row_id}_scene_{i+1}.png")
-                shutil.copy(src, dst)
+                await asyncio.to_thread(copy_scene, row_id, src, dst)
                 state["image_paths"][i] = dst
 
     # Final Verification for LangGraph State
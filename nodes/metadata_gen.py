@@ -0,0 +1,130 @@
+import os
+import json
+import asyncio
+import logging
+from google import genai
+from google.genai import types
+
+from utils import ledger, manifest
+from config import OUTPUT_DIR, GEMINI_API_KEY_1, VIDEO_METADATA_GENERATION_MODEL
+
+# Set up production logging
+logger = logging.getLogger(__name__)
+
+# Speculative generations in flight, keyed by row (started before the heavy nodes run)
+_inflight = {}
+
+# --- HELPER 1: Metadata Generator ---
+def get_llm_metadata(topic):
+    """Generates viral metadata with CTA, Pausing, and User Engagement focus."""
+    client = genai.Client(api_key=GEMINI_API_KEY_1)
+    
+    prompt = f"""
+Act as a Senior YouTube Strategist for 'Zeteon'.
+Topic: '{topic}'
+
+YOUR TASK:
+1. Create a high-retention title including #Shorts.
+2. The description must include a clear Call to Action (CTA).
+3. The pinned_comment must be a 'pausing' prompt—a surprising fact or question that encourages a reply.
+4. Instagram caption must be punchy and optimized for Reels.
+
+STRICT OUTPUT FORMAT:
+Return ONLY a JSON object. No markdown, no explanations.
+
+REQUIRED JSON STRUCTURE:
+{{
+    "youtube": {{
+        "title": "string",
+        "description": "string",
+        "tags": ["#tag1", "#tag2"],
+        "pinned_comment": "string"
+    }},
+    "insta": {{
+        "caption": "string",
+        "hashtags": ["#tag1", "#tag2"]
+    }}
+}}
+"""
+
+    try:
+        with ledger.track(
+            "gemini", "generateContent", stage="metadata", api_key="Key 1", unit="tokens",
+            model=VIDEO_METADATA_GENERATION_MODEL
+        ) as call:
+            response = client.models.generate_content(
+                model=VIDEO_METADATA_GENERATION_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    temperature=0.2,
+                )
+            )
+            usage = response.usage_metadata
+            if usage:
+                call["units_in"] = usage.prompt_token_count or 0
+                call["units_out"] = usage.candidates_token_count or 0
+        
+        data = json.loads(response.text.strip())
+        if isinstance(data, list): data = data[0]
+
+        if 'youtube' in data and 'insta' in data:
+            logger.info(f"✅ Metadata successfully generated for: {topic}")
+            return data
+        else:
+            logger.error(f"❌ LLM Schema Drift: {list(data.keys())}")
+            return None
+
+    except Exception as e:
+        logger.error(f"❌ Metadata Gen Error: {str(e)}")
+        return None
+
+def metadata_cache_path(row_idx):
+    return os.path.join(OUTPUT_DIR, f"metadata_row_{row_idx}.json")
+
+def load_cached_metadata(row_idx, topic):
+    """Returns cached metadata for this row if it was generated for the same topic."""
+    path = metadata_cache_path(row_idx)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            cached = json.load(f)
+        if cached.get("topic") == topic:
+            return cached["metadata"]
+    except (json.JSONDecodeError, KeyError) as e:
+        logger.warning(f"⚠️ Metadata cache corrupt for Row {row_idx}: {e}")
+    return None
+
+def generate_and_cache_metadata(row_idx, topic):
+    """Cache-first metadata generation; only successful results are persisted."""
+    cached = load_cached_metadata(row_idx, topic)
+    if cached:
+        logger.info(f"📦 Cache Hit: Metadata found for Row {row_idx}")
+        return cached
+
+    metadata = get_llm_metadata(topic)
+    if metadata:
+        manifest.atomic_write_json(metadata_cache_path(row_idx), {"topic": topic, "metadata": metadata})
+    return metadata
+
+def start_speculative_metadata(row_idx, topic):
+    """Kicks off metadata generation in the background so it overlaps audio, image and render work."""
+    task = _inflight.get(row_idx)
+    if task is None or (task.done() and (task.cancelled() or task.exception() or not task.result())):
+        logger.info(f"🔮 Speculative metadata generation started for Row {row_idx}")
+        task = asyncio.create_task(asyncio.to_thread(generate_and_cache_metadata, row_idx, topic))
+        _inflight[row_idx] = task
+    return task
+
+async def resolve_metadata(row_idx, topic):
+    """Awaits the speculative result if one is running, otherwise uses the cache or generates now."""
+    task = _inflight.pop(row_idx, None)
+    if task is not None:
+        try:
+            metadata = await task
+            if metadata:
+                return metadata
+        except Exception as e:
+            logger.warning(f"⚠️ Speculative metadata failed for Row {row_idx}: {e}")
+    return await asyncio.to_thread(generate_and_cache_metadata, row_idx, topic)
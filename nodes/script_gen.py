@@ -7,34 +7,36 @@ from typing import Dict, Any
 
 from utils.schema import flowstate
 from utils.sheets import get_worksheet
+from utils import ledger
 from config import (
     CLAUDE_API_KEY, SCRIPT_GENERATION_PROMPT, CLAUDE_MODEL, 
     CLAUDE_SCRIPT_IMAGE_PROMPT_URL, SCRIPT_GENERATION_SYSTEM_INSTRUCTIONS
 )
 
-# Set up structured logging for AWS CloudWatch
+# Structured logging is configured once by the entry point (utils/logging_setup.py)
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
+    before=ledger.note_attempt,
     reraise=True
 )
-def call_claude_api(payload: Dict, headers: Dict) -> Dict:
-    """Wrapper with retry logic for AWS stability."""
-    response = requests.post(
-        CLAUDE_SCRIPT_IMAGE_PROMPT_URL, 
-        headers=headers, 
-        json=payload, 
-        timeout=60
-    )
-    response.raise_for_status()
-    return response.json()
+def call_claude_api(payload: Dict, headers: Dict, stage: str = "script") -> Dict:
+    """Wrapper with retry logic for AWS stability; `stage` attributes the call in the cost ledger."""
+    with ledger.track("anthropic", "messages", stage=stage, unit="tokens", model=payload.get("model")) as call:
+        response = requests.post(
+            CLAUDE_SCRIPT_IMAGE_PROMPT_URL, 
+            headers=headers, 
+            json=payload, 
+            timeout=60
+        )
+        call["status"] = response.status_code
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage", {})
+        call["units_in"], call["units_out"] = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    return data
 
 def script_generation(state: flowstate) -> flowstate:
     """Node 1: Script generation with production-grade logging and validation."""
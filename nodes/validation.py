@@ -0,0 +1,151 @@
+import os
+import json
+import struct
+import logging
+
+from utils import manifest
+from utils.schema import flowstate
+from nodes.audio_gen import alignment_drift_ms
+from config import OUTPUT_DIR, VALIDATION_AV_TOLERANCE_MS, VALIDATION_MIN_IMAGE_SIDE
+
+# Set up production logging
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_dimensions(path):
+    """(width, height) from the IHDR chunk, or None if this is not a complete PNG. Reads 24 + 12 bytes."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+        if len(head) < 24 or head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+            return None
+        if not manifest.png_complete(path):
+            return None
+        return struct.unpack(">II", head[16:24])
+    except OSError:
+        return None
+
+
+def check_scene_durations(scenes, issues):
+    """Non-positive or missing Scene_Duration values get the mean of the valid ones (assembly rescales to the VO anyway)."""
+    durations = []
+    for scene in scenes:
+        try:
+            durations.append(float(scene.get("Scene_Duration")))
+        except (TypeError, ValueError):
+            durations.append(0.0)
+    valid = [d for d in durations if d > 0]
+    fill = sum(valid) / len(valid) if valid else 1.0
+    for i, d in enumerate(durations):
+        if d <= 0:
+            issues.append(f"repaired: scene {i+1} duration {scenes[i].get('Scene_Duration')!r} -> {fill:.2f}s")
+            scenes[i]["Scene_Duration"] = fill
+
+
+def check_images(image_paths, issues):
+    """
+    Scenes with a corrupt, truncated or tiny still borrow the nearest good neighbour for this render.
+    The repair lives in state only: the scene's own file and manifest entry are untouched, so image_gen
+    still regenerates a missing or corrupt still on the next run. Returns False if no still is good.
+    """
+    good = []
+    for i, path in enumerate(image_paths):
+        dims = png_dimensions(path) if path and os.path.exists(path) else None
+        if dims is None:
+            issues.append(f"scene {i+1}: missing or corrupt PNG")
+        elif min(dims) < VALIDATION_MIN_IMAGE_SIDE:
+            issues.append(f"scene {i+1}: image {dims[0]}x{dims[1]} is below {VALIDATION_MIN_IMAGE_SIDE}px")
+            dims = None
+        good.append(dims is not None)
+
+    if not any(good):
+        return False
+    for i, ok in enumerate(good):
+        if ok:
+            continue
+        donor = min((j for j, g in enumerate(good) if g), key=lambda j: abs(j - i))
+        image_paths[i] = image_paths[donor]
+        issues.append(f"repaired: scene {i+1} uses scene {donor+1}'s image")
+    return True
+
+
+def check_audio_alignment(row_id, issues):
+    """VO must exist and the alignment's last end time must agree with its duration. Returns False on reject."""
+    vo_path = os.path.join(OUTPUT_DIR, f"vo_row_{row_id}.mp3")
+    alignment_path = os.path.join(OUTPUT_DIR, f"alignment_row_{row_id}.json")
+    try:
+        with open(alignment_path, "r") as f:
+            alignment = json.load(f)
+        chars = alignment["characters"]
+        starts = alignment["character_start_times_seconds"]
+        ends = alignment["character_end_times_seconds"]
+    except (OSError, ValueError, KeyError) as e:
+        issues.append(f"alignment unreadable: {e}")
+        return False
+    if not chars or not len(chars) == len(starts) == len(ends):
+        issues.append(f"alignment arrays disagree: {len(chars)} chars, {len(starts)} starts, {len(ends)} ends")
+        return False
+    if any(b < a for a, b in zip(starts, starts[1:])):
+        issues.append("alignment start times go backwards")
+        return False
+
+    entry = manifest.get_entry(row_id, vo_path, adopt=manifest.media_complete) if os.path.exists(vo_path) else None
+    if not entry or not entry.get("duration"):
+        issues.append("voiceover missing or unreadable")
+        return False
+
+    drift_ms = alignment_drift_ms(alignment, entry["duration"])
+    if abs(drift_ms) > VALIDATION_AV_TOLERANCE_MS:
+        # Report only: the files are paid TTS output, and whether to re-synthesise is audio_gen's call
+        issues.append(
+            f"alignment ends {drift_ms:+.0f} ms from the {entry['duration']:.3f}s voiceover "
+            f"(tolerance {VALIDATION_AV_TOLERANCE_MS} ms)"
+        )
+        return False
+    return True
+
+
+def validate_render_inputs(state: flowstate) -> flowstate:
+    """Node 3c: Millisecond-cheap checks of everything the render reads; repairs what it can, rejects the rest."""
+    row_id = state["row_index"]
+    scenes = state["script"].get("scenes", [])
+    image_paths = list(state.get("image_paths") or [])
+    issues = []
+    ok = True
+
+    if not scenes:
+        issues.append("script has no scenes")
+        ok = False
+    else:
+        check_scene_durations(scenes, issues)
+
+        if len(image_paths) > len(scenes):
+            issues.append(f"repaired: {len(image_paths)} images for {len(scenes)} scenes, extras dropped")
+            image_paths = image_paths[:len(scenes)]
+        elif len(image_paths) < len(scenes):
+            issues.append(f"{len(image_paths)} images for {len(scenes)} scenes")
+            ok = False
+
+        if ok:
+            ok = check_images(image_paths, issues)
+            state["image_paths"] = image_paths
+
+        clips = state.get("video_paths") or []
+        for i, clip in enumerate(clips):
+            if clip and not manifest.is_valid(row_id, clip, adopt=manifest.media_complete):
+                clips[i] = None
+                issues.append(f"repaired: scene {i+1} clip unusable, falling back to its still")
+
+        ok = check_audio_alignment(row_id, issues) and ok
+
+    state["validation_issues"] = issues
+    state["isrenderready"] = ok
+    if ok:
+        for issue in issues:
+            logger.warning(f"🩹 Row {row_id}: {issue}")
+        logger.info(f"✅ Render inputs validated for Row {row_id} ({len(scenes)} scenes)")
+    else:
+        logger.error(f"🛑 Row {row_id} rejected before render: {'; '.join(issues)}")
+    return state
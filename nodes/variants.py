@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import subprocess
+
+from nodes.script_gen import call_claude_api
+from nodes.audio_gen import voiceover_paths, load_cached_voiceover, synthesize_voiceover
+from nodes.video_assembly import generate_ass_karaoke, render_visual_track
+from utils import manifest
+from utils.ffmpeg_runner import run_ffmpeg
+from utils.audio_master import pick_music, master_row_audio
+from utils.encode_profiles import resolve_encode_settings, x264_args
+from config import OUTPUT_DIR, CLAUDE_API_KEY, CLAUDE_MODEL, VARIANT_LANGUAGES
+
+# Set up production logging
+logger = logging.getLogger(__name__)
+
+PAUSE_AT_END = 1.5  # same CTA hold as the master render
+
+LANGUAGE_NAMES = {
+    "es": "Spanish", "pt": "Brazilian Portuguese", "fr": "French", "de": "German", "it": "Italian",
+    "hi": "Hindi", "id": "Indonesian", "ja": "Japanese", "ko": "Korean", "ar": "Arabic",
+}
+
+
+def translate_script(row_id, scenes, topic_comment, language):
+    """One Claude call per language: every scene's voiceover line plus the CTA, cached per row."""
+    cache_path = os.path.join(OUTPUT_DIR, f"script_row_{row_id}_{language}.json")
+    source = [scene["Voiceover_English"].strip() for scene in scenes]
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached.get("source") == source and cached.get("cta_source") == topic_comment:
+            return cached
+
+    prompt = (
+        f"Translate these narration lines of a short science video into {LANGUAGE_NAMES.get(language, language)}. "
+        "Keep each line's meaning, energy and roughly its spoken length. "
+        'Return ONLY JSON: {"lines": ["..."], "cta": "..."} with exactly one entry per input line.\n\n'
+        f"LINES: {json.dumps(source, ensure_ascii=False)}\nCTA: {json.dumps(topic_comment, ensure_ascii=False)}"
+    )
+    response_json = call_claude_api(
+        {"model": CLAUDE_MODEL, "max_tokens": 4000, "messages": [{"role": "user", "content": prompt}]},
+        {"x-api-key": CLAUDE_API_KEY, "anthropic-version": "2023-06-01", "content-type": "application/json"},
+        stage="variants",
+    )
+    text = response_json["content"][0]["text"]
+    translated = json.loads(re.search(r"\{.*\}", text, re.DOTALL).group(0))
+    if len(translated.get("lines", [])) != len(source):
+        raise ValueError(f"Translation to {language} returned {len(translated.get('lines', []))} lines for {len(source)} scenes")
+
+    translated.update({"source": source, "cta_source": topic_comment})
+    manifest.atomic_write_json(cache_path, translated)
+    return translated
+
+
+def mux_variant(state, language, visual_path, visual_dur, encode_profile=None):
+    """Visual track + this language's mastered audio + a subtitle overlay pass (no zoompan/xfade)."""
+    row_id = state["row_index"]
+    scenes = state["script"]["scenes"]
+    translated = translate_script(row_id, scenes, state.get("topic_comment") or "LIKE & FOLLOW FOR MORE!", language)
+
+    vo_path, alignment_path = voiceover_paths(row_id, language)
+    alignment = load_cached_voiceover(row_id, vo_path, alignment_path)
+    if alignment is None:
+        alignment = synthesize_voiceover(row_id, " ".join(translated["lines"]), vo_path, alignment_path)
+    vo_duration = manifest.get_entry(row_id, vo_path)["duration"]
+    total_dur = vo_duration + PAUSE_AT_END
+
+    mix_path, mix_key = master_row_audio(
+        row_id, vo_path, PAUSE_AT_END, pick_music(row_id), vo_duration, suffix=f"_{language}"
+    )
+    ass_path = os.path.join(OUTPUT_DIR, f"subs_row_{row_id}_{language}.ass")
+    out_path = os.path.join(OUTPUT_DIR, f"Video_Row_{row_id}_{language}.mp4")
+    key_path = os.path.join(OUTPUT_DIR, f"render_row_{row_id}_{language}.json")
+    try:
+        generate_ass_karaoke(state, alignment, translated["cta"], PAUSE_AT_END, ass_path=ass_path)
+        encode = resolve_encode_settings(total_dur, encode_profile)
+        variant_key = hashlib.sha256(json.dumps({
+            "visual": manifest.get_entry(row_id, visual_path)["sha256"],
+            "subtitles": manifest.file_digest(ass_path),
+            "audio": mix_key,
+            "duration": round(total_dur, 3),
+            "encode_profile": encode["profile"],
+        }, sort_keys=True).encode()).hexdigest()
+
+        if manifest.is_valid(row_id, out_path) and os.path.exists(key_path):
+            with open(key_path, "r") as f:
+                if json.load(f).get("render_key") == variant_key:
+                    logger.info(f"📦 Cache Hit: {language} variant is up to date for Row {row_id}")
+                    return out_path
+
+        # Scene cuts follow the primary VO; a longer translation holds the last frame under the CTA
+        escaped_ass = ass_path.replace("\\", "/").replace(":", "\\:").replace(" ", "\\ ")
+        v_filter = f"ass=filename='{escaped_ass}'"
+        if total_dur > visual_dur:
+            v_filter = f"tpad=stop_mode=clone:stop_duration={total_dur - visual_dur:.3f}," + v_filter
+
+        with manifest.atomic_output(out_path) as tmp_path:
+            run_ffmpeg([
+                "ffmpeg", "-y", "-i", visual_path, "-i", mix_path,
+                "-vf", v_filter, "-map", "0:v", "-map", "1:a",
+                *x264_args(encode), "-c:a", "copy",
+                "-t", f"{total_dur:.3f}", tmp_path
+            ], expected_duration=total_dur, label=f"Row {row_id} {language} variant")
+        manifest.record(row_id, out_path, duration=total_dur)
+        manifest.atomic_write_json(key_path, {"render_key": variant_key})
+        logger.info(f"🌍 {language} variant ready for Row {row_id}")
+        return out_path
+    finally:
+        if os.path.exists(ass_path):
+            os.remove(ass_path)
+
+
+def language_variants(state):
+    """Node 4b: Localised cuts that reuse the rendered visual track; N languages cost ~one render."""
+    languages = state.get("variant_languages") or VARIANT_LANGUAGES
+    if not languages or not state.get("isvideogenerated"):
+        return state
+
+    row_id = state["row_index"]
+    state.setdefault("variant_paths", {})
+    try:
+        visual_path, visual_dur = render_visual_track(row_id)
+    except Exception as e:
+        logger.error(f"❌ Visual track unavailable for Row {row_id}, skipping variants: {e}")
+        return state
+
+    for language in languages:
+        try:
+            state["variant_paths"][language] = mux_variant(
+                state, language, visual_path, visual_dur, state.get("encode_profile")
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg failed for Row {row_id} ({language}): {e.stderr.decode()}")
+        except Exception as e:
+            logger.error(f"❌ {language} variant failed for Row {row_id}: {e}", exc_info=True)
+    return state
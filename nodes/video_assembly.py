@@ -2,24 +2,36 @@ import subprocess
 import os
 import json
 import re
-import random
+import hashlib
 import logging
 from utils.sheets import get_worksheet
-from config import OUTPUT_DIR
+from utils.publisher import get_publisher
+from utils import asset_manager, manifest, render_queue
+from utils.manifest import file_digest
+from utils.ffmpeg_runner import run_ffmpeg
+from utils.audio_master import pick_music, master_row_audio
+from utils.encode_profiles import resolve_encode_settings, x264_args, record_encode_outcome, RENDITIONS
+from utils.motion import motion_args, ENGINE_REVISIONS, SOURCE_WIDTH, RESOLUTION, ZOOM_FPS, ZOOM_STEP, ZOOM_MAX
+from config import (
+    OUTPUT_DIR, SEGMENT_CACHE_DIR, MOTION_ENGINE, ENCODE_PROFILE, RENDITIONS_ENABLED, RENDER_MODE, RENDER_JOB_TIMEOUT_S
+)
 
 # Set up production logging
 logger = logging.getLogger(__name__)
 
+XFADE_DUR = 0.5
+SEGMENT_CRF = 12         # near-lossless intermediates; the final pass sets delivered quality
+
 def ass_ts(sec):
     """Timestamp helper for ASS Subtitles."""
     sec = max(0, sec)
     h, m, s = int(sec // 3600), int((sec % 3600) // 60), sec % 60
     return f"{h}:{m:02d}:{s:05.2f}"
 
-def generate_ass_karaoke(state, alignment_data, topic_comment, pause_at_end, max_words=4):
+def generate_ass_karaoke(state, alignment_data, topic_comment, pause_at_end, max_words=4, ass_path=None):
     """Node 4 Helper: Generates high-retention karaoke subtitles with CTA."""
     row_id = state["row_index"]
-    ass_path = os.path.join(OUTPUT_DIR, f"subs_row_{row_id}.ass")
+    ass_path = ass_path or os.path.join(OUTPUT_DIR, f"subs_row_{row_id}.ass")
     
     chars = alignment_data["characters"]
     starts = alignment_data["character_start_times_seconds"]
@@ -30,7 +42,7 @@ def generate_ass_karaoke(state, alignment_data, topic_comment, pause_at_end, max
         if not word_start: word_start = starts[i]
         if ch.isspace() or i == len(chars) - 1:
             if cur_word.strip():
-                clean = re.sub(r'[^a-zA-Z0-9,\.\!\?\']', '', cur_word.strip())
+                clean = re.sub(r'[^\w,\.\!\?\']', '', cur_word.strip())  # \w keeps accented/non-Latin letters
                 words.append({"text": clean.upper(), "start": word_start, "end": ends[i]})
             cur_word, word_start = "", None
         else: 
@@ -69,18 +81,14 @@ def generate_ass_karaoke(state, alignment_data, topic_comment, pause_at_end, max
     return ass_path
 
 def sync_to_cloud(file_path, row_id):
-    """Syncs final assets to GitHub and updates Google Sheets status."""
-    GITHUB_USER, GITHUB_REPO, GITHUB_BRANCH = "polarityreverse", "Content-Creation", "master"
+    """Publishes the final asset via the configured publisher and updates Google Sheets status."""
+    raw_url = None
     try:
-        # In AWS, ensure the Git environment is initialized or use a dedicated API upload
-        subprocess.run(["git", "add", file_path], check=True, capture_output=True)
-        subprocess.run(["git", "commit", "-m", f"Upload Video_Row_{row_id}"], check=True, capture_output=True)
-        subprocess.run(["git", "push", "origin", GITHUB_BRANCH], check=True, capture_output=True)
-        logger.info(f"Git: Video {row_id} pushed to branch {GITHUB_BRANCH}")
+        raw_url = get_publisher().publish(file_path)
+        logger.info(f"Publish: Video {row_id} available at {raw_url}")
     except Exception as e:
-        logger.error(f"Git Push failed for row {row_id}: {e}")
-    
-    raw_url = f"https://raw.githubusercontent.com/{GITHUB_USER}/{GITHUB_REPO}/{GITHUB_BRANCH}/assets/{os.path.basename(file_path)}"
+        logger.error(f"Publish failed for row {row_id}: {e}")
+        return None
     
     try:
         sheet = get_worksheet("ideas")
@@ -94,32 +102,211 @@ def sync_to_cloud(file_path, row_id):
 
     return raw_url
 
+def rendition_paths(row_id, renditions):
+    """Output paths for the master plus every requested extra rendition."""
+    paths = {"master": os.path.join(OUTPUT_DIR, f"Video_Row_{row_id}.mp4")}
+    for name in renditions:
+        paths[name] = os.path.join(OUTPUT_DIR, f"Video_Row_{row_id}{RENDITIONS[name]['suffix']}.mp4")
+    return paths
+
+def segment_key(image_digest, duration, engine=MOTION_ENGINE):
+    """Cache key for one rendered scene: image bytes + every parameter that shapes its pixels."""
+    params = {
+        "image": image_digest,
+        "duration": round(duration, 3),
+        "engine": engine,
+        "zoom": {"step": ZOOM_STEP, "max": ZOOM_MAX, "source_width": SOURCE_WIDTH},
+        "fps": ZOOM_FPS,
+        "resolution": RESOLUTION,
+        "crf": SEGMENT_CRF,
+    }
+    if engine in ENGINE_REVISIONS:
+        params["revision"] = ENGINE_REVISIONS[engine]
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:24]
+
+def render_scene_segment(image_path, duration, key, engine=MOTION_ENGINE):
+    """Renders one scene (zoomed still or fitted clip) into the segment cache (skips if cached)."""
+    seg_path = os.path.join(SEGMENT_CACHE_DIR, f"seg_{key}.mp4")
+    if os.path.exists(seg_path):  # only ever created by an atomic rename, so existence is enough
+        return seg_path, True
+
+    input_args, v_filter = motion_args(engine, duration)
+    with manifest.atomic_output(seg_path) as tmp_path:
+        cmd = [
+            "ffmpeg", "-y", *input_args, "-i", image_path,
+            "-vf", v_filter, "-an",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(SEGMENT_CRF), "-preset", "veryfast",
+            "-t", f"{duration:.3f}", tmp_path
+        ]
+        run_ffmpeg(cmd, expected_duration=duration, label=f"segment {key[:8]}")
+    return seg_path, False
+
+def xfade_offsets(scene_durations):
+    """Start time of each crossfade: the cumulative (stretched) length of the scenes before it."""
+    offsets, cur_offset = [], 0
+    for dur in scene_durations[:-1]:
+        cur_offset += dur
+        offsets.append(round(cur_offset, 3))
+    return offsets
+
+def xfade_filter(offsets):
+    """Crossfade chain over inputs [0:v]..[n:v]; returns (filter string, label of the last output)."""
+    concat_filter, last_v = "", "0:v"
+    for i, offset in enumerate(offsets, start=1):
+        concat_filter += f"[{last_v}][{i}:v]xfade=transition=fade:duration={XFADE_DUR}:offset={offset:.3f}[xf{i}];"
+        last_v = f"xf{i}"
+    return concat_filter, last_v
+
+def render_visual_track(row_id):
+    """
+    Silent, subtitle-free cut of a rendered row (same segments and xfade timeline as the master).
+    Language variants overlay their own audio and subtitles on it instead of re-rendering the scenes.
+    """
+    with open(os.path.join(OUTPUT_DIR, f"render_row_{row_id}.json"), "r") as f:
+        render = json.load(f)
+    if "offsets" not in render:
+        raise ValueError(f"Row {row_id} was rendered before visual tracks existed; re-render it first.")
+    segment_paths = [os.path.join(SEGMENT_CACHE_DIR, f"seg_{key}.mp4") for key in render["segments"]]
+    missing = [p for p in segment_paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} segment(s) of Row {row_id} were evicted; re-render it first.")
+
+    visual_path = os.path.join(OUTPUT_DIR, f"visual_row_{row_id}.mp4")
+    key_path = os.path.join(OUTPUT_DIR, f"visual_row_{row_id}.json")
+    visual_key = hashlib.sha256(json.dumps({
+        "segments": render["segments"], "offsets": render["offsets"],
+        "duration": render["duration"], "crf": SEGMENT_CRF,
+    }, sort_keys=True).encode()).hexdigest()[:24]
+    if manifest.is_valid(row_id, visual_path) and os.path.exists(key_path):
+        with open(key_path, "r") as f:
+            if json.load(f).get("visual_key") == visual_key:
+                return visual_path, render["duration"]
+
+    concat_filter, last_v = xfade_filter(render["offsets"])
+    cmd = ["ffmpeg", "-y"]
+    for seg_path in segment_paths:
+        cmd += ["-i", seg_path]
+    if concat_filter:
+        cmd += ["-filter_complex", concat_filter.rstrip(";"), "-map", f"[{last_v}]"]
+    else:
+        cmd += ["-map", "0:v"]
+    with manifest.atomic_output(visual_path) as tmp_path:
+        cmd += [
+            "-an", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(SEGMENT_CRF), "-preset", "veryfast",
+            "-t", f"{render['duration']:.3f}", tmp_path
+        ]
+        run_ffmpeg(cmd, expected_duration=render["duration"], label=f"Row {row_id} visual track")
+    manifest.record(row_id, visual_path, duration=render["duration"])
+    manifest.atomic_write_json(key_path, {"visual_key": visual_key})
+    logger.info(f"🎞️ Visual track ready for Row {row_id}")
+    return visual_path, render["duration"]
+
+# --- RENDER FARM (RENDER_MODE=queue) ---
+RENDER_STATE_KEYS = ("row_index", "idea", "script", "topic_comment")
+
+def render_settings(state):
+    """Output-shaping settings as the orchestrator resolves them, so a worker's own env never changes the result."""
+    return {
+        "encode_profile": state.get("encode_profile") or ENCODE_PROFILE,
+        "renditions": [r for r in (state.get("renditions") or RENDITIONS_ENABLED) if r in RENDITIONS],
+        "motion_engine": state.get("motion_engine") or MOTION_ENGINE,
+    }
+
+def render_job_spec(state):
+    """
+    Self-contained render job: everything video_stitching_slideshow reads, with asset paths relative
+    to ASSETS_DIR (each host mounts the shared directory wherever it likes) and the sha256 of every
+    input so a worker can refuse to render files its mount has not caught up with yet.
+    """
+    row_id = state["row_index"]
+    row_manifest = manifest.load_manifest(row_id)
+
+    def rel(path):
+        return os.path.relpath(path, OUTPUT_DIR) if path else None
+
+    inputs = [p for p in state.get("image_paths", []) if p]
+    inputs += [p for p in (state.get("video_paths") or []) if p]
+    inputs += [os.path.join(OUTPUT_DIR, f"vo_row_{row_id}.mp3"), os.path.join(OUTPUT_DIR, f"alignment_row_{row_id}.json")]
+    digests = {}
+    for path in inputs:
+        entry = manifest.get_entry(row_id, path, row_manifest)
+        digests[rel(path)] = entry["sha256"] if entry else file_digest(path)
+
+    return {
+        "state": {
+            **{k: state[k] for k in RENDER_STATE_KEYS if state.get(k) is not None},
+            **render_settings(state),
+            "image_paths": [rel(p) for p in state.get("image_paths", [])],
+            "video_paths": [rel(p) for p in (state.get("video_paths") or [])],
+        },
+        "inputs": digests,
+        "outputs": {"final": rel(os.path.join(OUTPUT_DIR, f"Video_Row_{row_id}.mp4"))},
+    }
+
+def render_via_queue(state):
+    """Submits the render to the job queue and waits for a worker; publishing stays on this host."""
+    row_id = state["row_index"]
+    job_id = render_queue.submit(row_id, render_job_spec(state))
+    logger.info(f"🛰️ Row {row_id} queued as render job {job_id} (waiting up to {RENDER_JOB_TIMEOUT_S:.0f}s)")
+    try:
+        job = render_queue.wait(job_id, RENDER_JOB_TIMEOUT_S)
+    except TimeoutError as e:
+        logger.error(f"❌ {e}")
+        state["isvideogenerated"] = False
+        return state
+
+    if job["status"] != "done":
+        logger.error(f"❌ Render job {job_id} for Row {row_id} failed after {job['attempts']} attempt(s): {job['error']}")
+        state["isvideogenerated"] = False
+        return state
+
+    result = job["result"]
+    state["final_video_path"] = os.path.join(OUTPUT_DIR, result["final_video_path"])
+    state["rendition_paths"] = {name: os.path.join(OUTPUT_DIR, p) for name, p in result["rendition_paths"].items()}
+    state["isvideogenerated"] = True
+    if state.get("publish", True) and result.get("rendered"):
+        sync_to_cloud(state["rendition_paths"].get("insta", state["final_video_path"]), row_id)
+    return state
+
 def video_stitching_slideshow(state):
-    """Node 4: Main FFmpeg engine with synced timing and CTA pause."""
+    """Node 4: Main FFmpeg engine with synced timing, cached scene segments and CTA pause."""
+    if (state.get("render_mode") or RENDER_MODE) == "queue":
+        return render_via_queue(state)
+
     row_id = state.get("row_index")
     output_filename = f"Video_Row_{row_id}.mp4"
     final_video_path = os.path.join(OUTPUT_DIR, output_filename)
-    
+    render_key_path = os.path.join(OUTPUT_DIR, f"render_row_{row_id}.json")
+
     # 1. CACHE & LOGGING
     log_extra = {"row_index": row_id}
-    if os.path.exists(final_video_path):
+    row_manifest = manifest.load_manifest(row_id)
+    if (not os.path.exists(render_key_path)
+            and manifest.is_valid(row_id, final_video_path, row_manifest, adopt=manifest.media_complete)):
+        # Legacy render without a recorded key: keep treating it as final
         logger.info(f"📦 Cache Hit: Assembled video found for Row {row_id}", extra=log_extra)
+        asset_manager.touch(row_id, "RENDERED")
         state["isvideogenerated"] = True
         state["final_video_path"] = final_video_path
         return state
 
+    renditions = state.get("renditions")
+    renditions = [r for r in (RENDITIONS_ENABLED if renditions is None else renditions) if r in RENDITIONS]
+    output_paths = rendition_paths(row_id, renditions)
     image_files = state.get("image_paths", [])
     scenes = state["script"].get("scenes", [])
     topic_comment = state.get("topic_comment") or "LIKE & FOLLOW FOR MORE!"
     audio_vo = os.path.join(OUTPUT_DIR, f"vo_row_{row_id}.mp3")
+    ass_path = None
 
     try:
         # 2. TIMING & DURATION CALCULATIONS
         with open(os.path.join(OUTPUT_DIR, f"alignment_row_{row_id}.json"), "r") as f:
             alignment_data = json.load(f)
 
-        cmd_dur = f'ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{audio_vo}"'
-        vo_duration = float(subprocess.check_output(cmd_dur, shell=True))
+        # VO duration/hash come from the manifest (recorded once by audio_gen) instead of re-probing
+        vo_entry = manifest.get_entry(row_id, audio_vo, row_manifest, adopt=manifest.media_complete)
+        vo_duration = vo_entry["duration"] if vo_entry else manifest.probe_duration(audio_vo)
         pause_at_end = 1.5 
         total_target_dur = vo_duration + pause_at_end
 
@@ -129,77 +316,151 @@ def video_stitching_slideshow(state):
         calc_durs = []
         for i in range(len(image_files)):
             base_dur = float(scenes[i]["Scene_Duration"]) * stretch_factor
-            calc_durs.append(base_dur + (0.5 if i < len(image_files) - 1 else pause_at_end))
+            calc_durs.append(base_dur + (XFADE_DUR if i < len(image_files) - 1 else pause_at_end))
+
+        # 3. SCENE SOURCES & SEGMENT KEYS (a generated clip replaces its scene's still; bytes + motion parameters)
+        engine = state.get("motion_engine") or MOTION_ENGINE
+        clips = state.get("video_paths") or []
+        sources, engines, source_digests = [], [], []
+        for i, img in enumerate(image_files):
+            clip = clips[i] if i < len(clips) else None
+            clip_entry = clip and manifest.get_entry(row_id, clip, row_manifest, adopt=manifest.media_complete)
+            if clip_entry:
+                sources.append(clip)
+                engines.append("clip")
+                source_digests.append(clip_entry["sha256"])
+                continue
+            entry = manifest.get_entry(row_id, img, row_manifest, adopt=manifest.png_complete)
+            sources.append(img)
+            engines.append(engine)
+            source_digests.append(entry["sha256"] if entry else file_digest(img))
+        seg_keys = [segment_key(source_digests[i], calc_durs[i], engines[i]) for i in range(len(image_files))]
+
+        # 4. AUDIO MASTERING (cached per row; the render only muxes the AAC result)
+        mix_path, mix_key = master_row_audio(row_id, audio_vo, pause_at_end, pick_music(row_id), vo_duration)
 
-        # 3. CONSTRUCT FILTERS
-        v_filters = []
-        for i in range(len(image_files)):
-            v_filters.append(
-                f"[{i}:v]scale=2160:-1,format=yuv420p,fps=30,"
-                f"zoompan=z='min(zoom+0.001,1.5)':d={int(calc_durs[i]*30)}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1080x1920[v{i}];"
-            )
-
-        concat_filter, last_v, cur_offset = "", "v0", 0
-        for i in range(1, len(image_files)):
-            cur_offset += (float(scenes[i-1]["Scene_Duration"]) * stretch_factor)
-            concat_filter += f"[{last_v}][v{i}]xfade=transition=fade:duration=0.5:offset={cur_offset:.3f}[xf{i}];"
-            last_v = f"xf{i}"
-
-        # 4. AUDIO MASTERING
-        selected_music = None
-        if os.path.exists(OUTPUT_DIR):
-            mp3s = [f for f in os.listdir(OUTPUT_DIR) if f.lower().startswith('bkg_music') and f.lower().endswith('.mp3')]
-            if mp3s: selected_music = os.path.join(OUTPUT_DIR, random.choice(mp3s))
-
-        vo_idx, bg_idx = len(image_files), len(image_files) + 1
-        fade_start = total_target_dur - 1.0
-
-        if selected_music:
-            audio_filter = (
-                f"[{vo_idx}:a]apad=pad_dur={pause_at_end},asplit=2[vo_p1][vo_p2];"
-                f"[{bg_idx}:a]volume=0.12,aloop=loop=-1:size=2e+09,afade=t=out:st={fade_start}:d=1[bg_loop];"
-                f"[bg_loop][vo_p1]sidechaincompress=threshold=0.05:ratio=12:attack=20:release=200[bg_duck];"
-                f"[vo_p2][bg_duck]amix=inputs=2:duration=longest:weights=1 1[a_final]"
-            )
-        else:
-            audio_filter = f"[{vo_idx}:a]apad=pad_dur={pause_at_end}[a_final]"
-            
         ass_path = generate_ass_karaoke(state, alignment_data, topic_comment, pause_at_end)
         escaped_ass = ass_path.replace("\\", "/").replace(":", "\\:").replace(" ", "\\ ")
 
-        # 5. EXECUTE FFMPEG
+        # 5. FINAL RENDER KEY (segments + overlay + audio + profile); unchanged key means nothing to redo
+        encode_profile = state.get("encode_profile")
+        encode = resolve_encode_settings(total_target_dur, encode_profile)
+        render_key = hashlib.sha256(json.dumps({
+            "segments": seg_keys,
+            "subtitles": file_digest(ass_path),
+            "audio": mix_key,
+            "duration": round(total_target_dur, 3),
+            "encode_profile": encode["profile"],
+            "renditions": sorted(renditions),
+        }, sort_keys=True).encode()).hexdigest()
+
+        if all(manifest.is_valid(row_id, p, row_manifest) for p in output_paths.values()) and os.path.exists(render_key_path):
+            with open(render_key_path, "r") as f:
+                if json.load(f).get("render_key") == render_key:
+                    logger.info(f"📦 Cache Hit: Assembled video is up to date for Row {row_id}", extra=log_extra)
+                    asset_manager.touch(row_id, "RENDERED")
+                    state["isvideogenerated"] = True
+                    state["final_video_path"] = final_video_path
+                    state["rendition_paths"] = output_paths
+                    return state
+            logger.info(f"♻️ Inputs changed for Row {row_id}, re-rendering stale parts only...")
+
+        # 6. RENDER SCENE SEGMENTS (only the ones whose inputs changed)
+        segment_paths, reused = [], 0
+        for i, source in enumerate(sources):
+            seg_path, hit = render_scene_segment(source, calc_durs[i], seg_keys[i], engines[i])
+            segment_paths.append(seg_path)
+            reused += int(hit)
+        logger.info(
+            f"🧩 Segments for Row {row_id} ({engine}, {engines.count('clip')} clip scene(s)): "
+            f"{reused} cached, {len(segment_paths) - reused} rendered"
+        )
+
+        # 7. OVERLAY FILTERS (xfade chain + subtitles)
+        offsets = xfade_offsets([float(s["Scene_Duration"]) * stretch_factor for s in scenes[:len(segment_paths)]])
+        concat_filter, last_v = xfade_filter(offsets)
+
+        audio_idx = len(segment_paths)
+
+        # 8. EXECUTE FFMPEG (overlay + mux pass)
         cmd = ["ffmpeg", "-y"]
-        for i, img in enumerate(image_files):
-            cmd += ["-loop", "1", "-t", f"{calc_durs[i]:.3f}", "-i", img]
-        cmd += ["-i", audio_vo]
-        if selected_music: cmd += ["-i", selected_music]
+        for seg_path in segment_paths:
+            cmd += ["-i", seg_path]
+        cmd += ["-i", mix_path]
 
-        full_filter = "".join(v_filters) + concat_filter + f"[{last_v}]ass=filename='{escaped_ass}'[v_final];" + audio_filter
+        full_filter = concat_filter + f"[{last_v}]ass=filename='{escaped_ass}'[v_final]"
 
-        cmd += [
-            "-filter_complex", full_filter,
-            "-map", "[v_final]", "-map", "[a_final]",
-            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "18", "-preset", "veryfast",
-            "-t", f"{total_target_dur:.3f}", final_video_path
-        ]
+        # Renditions share one decode/xfade/subtitle graph, split just before the encoders
+        outputs = [("v_final", [*x264_args(encode), "-c:a", "copy"], final_video_path)]
+        if renditions:
+            n = len(renditions) + 1
+            full_filter += f";[v_final]split={n}" + "".join(f"[v_out{k}]" for k in range(n))
+            outputs = [("v_out0", outputs[0][1], final_video_path)]
+            for k, name in enumerate(renditions, start=1):
+                spec, v_label = RENDITIONS[name], f"v_out{k}"
+                if spec["scale"]:
+                    full_filter += f";[v_out{k}]scale={spec['scale'][0]}:{spec['scale'][1]}[v_scaled{k}]"
+                    v_label = f"v_scaled{k}"
+                outputs.append((v_label, spec["args"], output_paths[name]))
+
+        # Every output is written to a temp file and only renamed into place once ffmpeg succeeds
+        cmd += ["-filter_complex", full_filter]
+        tmp_outputs = {}
+        for v_label, codec_args, out_path in outputs:
+            tmp_outputs[out_path] = manifest.tmp_path_for(out_path)
+            cmd += [
+                "-map", f"[{v_label}]", "-map", f"{audio_idx}:a",
+                *codec_args,
+                "-t", f"{total_target_dur:.3f}", tmp_outputs[out_path]
+            ]
 
-        logger.info(f"🎬 Starting FFmpeg assembly for Row {row_id}...")
-        subprocess.run(cmd, check=True, capture_output=True)
+        logger.info(
+            f"🎬 Starting FFmpeg assembly for Row {row_id} ({encode['profile']}: {encode['preset']}/crf{encode['crf']}"
+            f"{', + ' + ', '.join(renditions) if renditions else ''})..."
+        )
+        try:
+            progress = run_ffmpeg(cmd, expected_duration=total_target_dur, label=f"Row {row_id} assembly")
+            for out_path, tmp_path in tmp_outputs.items():
+                os.replace(tmp_path, out_path)
+                manifest.record(row_id, out_path, duration=total_target_dur)
+        finally:
+            for tmp_path in tmp_outputs.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        record_encode_outcome(
+            {**encode, "renditions": renditions}, total_target_dur,
+            progress["wall_s"], final_video_path, row_id
+        )
+        manifest.atomic_write_json(render_key_path, {
+            "render_key": render_key, "segments": seg_keys,
+            "offsets": offsets, "duration": round(total_target_dur, 3),
+        })
+        asset_manager.touch(row_id, "RENDERED")
         
-        # 6. SYNC & CLEANUP
-        sync_to_cloud(final_video_path, row_id)
+        # 9. SYNC & CLEANUP (Instagram pulls the public URL, so publish its tuned rendition when present)
+        if state.get("publish", True):
+            sync_to_cloud(output_paths.get("insta", final_video_path), row_id)
         state["final_video_path"] = final_video_path
+        state["rendition_paths"] = output_paths
         state["isvideogenerated"] = True
-        
-        # Cleanup temporary .ass file to save space in AWS /tmp
-        if os.path.exists(ass_path):
-            os.remove(ass_path)
 
     except subprocess.CalledProcessError as e:
-        logger.error(f"FFmpeg failed for Row {row_id}: {e.stderr.decode()}", exc_info=True)
+        stderr = (e.stderr or b"").decode(errors="replace")
+        logger.error(f"FFmpeg failed for Row {row_id}: {stderr}", exc_info=True)
+        tool = os.path.basename(e.cmd[0]) if isinstance(e.cmd, (list, tuple)) else "ffmpeg"
+        state["render_error"] = f"{tool} exited {e.returncode}: {stderr.strip()[-1000:] or 'no stderr'}"
+        state["isvideogenerated"] = False
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"FFmpeg watchdog fired for Row {row_id}: {e}\n{(e.stderr or b'').decode()}")
+        state["render_error"] = f"ffmpeg watchdog: {e}"
         state["isvideogenerated"] = False
     except Exception as e:
         logger.error(f"Node 4 Critical Failure: {str(e)}", exc_info=True)
+        state["render_error"] = f"{type(e).__name__}: {e}"
         state["isvideogenerated"] = False
+    finally:
+        # Cleanup temporary .ass file to save space in AWS /tmp
+        if ass_path and os.path.exists(ass_path):
+            os.remove(ass_path)
 
-    return state
\ No newline at end of file
+    return state
@@ -0,0 +1,152 @@
+import os
+import asyncio
+import logging
+from google import genai
+from google.genai import types
+from utils.schema import flowstate
+from utils.poller import poller
+from utils import manifest, ledger
+from config import (
+    OUTPUT_DIR, PROJECT_ID, LOCATION, VEO_MODEL_NAME, VEO_API_KEY, VEO_BASE_URL, VEO_CONCURRENCY, VEO_CLIP_SCENES
+)
+
+# Set up production logging
+logger = logging.getLogger(__name__)
+
+VEO_DURATIONS = (4, 6, 8)   # clip lengths the model accepts; shorter clips hold their last frame in assembly
+VEO_TIMEOUT_S = 600
+
+# -----------------------------
+# SHARED POLLER HOOK
+# -----------------------------
+async def check_veo_operations(handles):
+    """operations.get has no batch form, so each due op is refreshed on its own (max_batch=1)."""
+    results = []
+    for client, operation in handles:
+        operation = await client.aio.operations.get(operation)
+        results.append(("done", operation) if operation.done else ("pending", None))
+    return results
+
+poller.register_platform("veo", check_veo_operations, schedule=[15, 15, 20, 30])
+
+# -----------------------------
+# CLIENT & SCENE SELECTION
+# -----------------------------
+def make_veo_client():
+    """Vertex AI in production; VEO_BASE_URL points the Gemini API surface at a proxy or local fake."""
+    if VEO_BASE_URL:
+        return genai.Client(api_key=VEO_API_KEY or "local", http_options=types.HttpOptions(base_url=VEO_BASE_URL))
+    return genai.Client(vertexai=True, project=PROJECT_ID, location=LOCATION)
+
+def clip_scene_indices(scenes, selection=None):
+    """0-based scenes that get a clip: "all", or 1-based scene numbers such as "1,4"."""
+    selection = VEO_CLIP_SCENES if selection is None else selection
+    if not selection:
+        return []
+    if selection == "all":
+        picked = range(len(scenes))
+    else:
+        picked = [int(n) - 1 for n in selection.split(",") if n.strip()]
+    return [i for i in picked if 0 <= i < len(scenes) and scenes[i].get("Video_Action_Prompt")]
+
+def veo_duration(scene_duration):
+    return next((d for d in VEO_DURATIONS if d >= float(scene_duration)), VEO_DURATIONS[-1])
+
+# -----------------------------
+# WORKER: GENERATE SINGLE CLIP
+# -----------------------------
+async def generate_veo_clip(client, prompt, duration, filename, row_id=None):
+    """Worker function: Generates a single Veo clip without ever blocking the event loop."""
+
+    # Hash check (or an ffprobe for pre-manifest clips) runs in a worker thread
+    if await asyncio.to_thread(manifest.is_valid, row_id, filename, adopt=manifest.media_complete):
+        logger.info(f"✅ Video Cache Hit: {os.path.basename(filename)}")
+        return filename
+
+    clip_name = os.path.basename(filename)
+    try:
+        with ledger.track("veo", "generate_videos", stage="clips", row_id=row_id, unit="seconds", model=VEO_MODEL_NAME) as call:
+            # 1. Start generation
+            operation = await client.aio.models.generate_videos(
+                model=VEO_MODEL_NAME,
+                prompt=prompt,
+                config=types.GenerateVideosConfig(
+                    aspect_ratio="9:16",
+                    duration_seconds=duration,
+                )
+            )
+            logger.info(f"🚀 Started Gen: {clip_name}...")
+
+            # 2. Polling (shared poller, 10 minutes max)
+            try:
+                if not operation.done:
+                    operation = await poller.wait(
+                        "veo", operation.name, handle=(client, operation),
+                        timeout=VEO_TIMEOUT_S, label=clip_name
+                    )
+            except asyncio.TimeoutError:
+                call["status"] = "timeout"
+                logger.error(f"❌ Timeout for {clip_name}")
+                return None
+
+            # 3. Save video (Gemini API returns a URI, Vertex returns the bytes inline)
+            if operation.response and operation.response.generated_videos:
+                video_data = operation.response.generated_videos[0].video
+                if video_data.video_bytes is None:
+                    await client.aio.files.download(file=video_data)
+                await asyncio.to_thread(manifest.atomic_write_bytes, filename, video_data.video_bytes)
+                await asyncio.to_thread(manifest.record, row_id, filename)
+                call["units_out"] = duration
+                logger.info(f"💾 Saved: {clip_name}")
+                return filename
+
+            call["status"], call["error"] = "empty", str(operation.error or "")
+            logger.warning(f"⚠️ Operation finished but no video found for {clip_name}: {operation.error}")
+            return None
+
+    except Exception as e:
+        logger.error(f"❌ Veo Error for {clip_name}: {e}")
+        return None
+
+
+# -----------------------------
+# MAIN NODE FUNCTION
+# -----------------------------
+async def video_generation(state: flowstate) -> flowstate:
+    """Node 3b: Veo clips for the selected scenes; assembly falls back to the still for any scene without one."""
+
+    if not state["isvoicegenerated"]:
+        logger.warning("⚠️ Skipping Clip Gen: Voiceover was not generated.")
+        return state
+
+    row_id = state["row_index"]
+    scenes = state["script"]["scenes"]
+    state["video_paths"] = [None] * len(scenes)
+
+    indices = clip_scene_indices(scenes, state.get("veo_clip_scenes"))
+    if not indices:
+        return state
+
+    client = make_veo_client()
+    semaphore = asyncio.Semaphore(VEO_CONCURRENCY)  # concurrent Veo operations are quota-limited
+
+    async def throttled_clip(i):
+        filename = os.path.join(OUTPUT_DIR, f"row_{row_id}_scene_{i+1}.mp4")
+        try:
+            duration = veo_duration(scenes[i].get("Scene_Duration") or 5)
+        except (TypeError, ValueError):
+            # A bad duration only costs this scene its clip; validation repairs the duration before the render
+            logger.warning(f"⚠️ Scene {i+1}: unusable Scene_Duration {scenes[i].get('Scene_Duration')!r}, keeping its still")
+            return None
+        async with semaphore:
+            return await generate_veo_clip(client, scenes[i]["Video_Action_Prompt"], duration, filename, row_id)
+
+    # No Claude refinement — directly use Video_Action_Prompt
+    logger.info(f"🎬 Generating {len(indices)} clip(s) via Veo (max {VEO_CONCURRENCY} at a time)...")
+    results = await asyncio.gather(*(throttled_clip(i) for i in indices))
+
+    for i, result in zip(indices, results):
+        state["video_paths"][i] = result
+
+    logger.info(f"✅ Clip Node Complete: {sum(r is not None for r in results)}/{len(indices)} clips for Row {row_id}")
+    return state
@@ -0,0 +1,171 @@
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+import threading
+
+from utils.manifest import file_lock
+from config import OUTPUT_DIR, SEGMENT_CACHE_DIR, ASSET_QUOTA_BYTES
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(OUTPUT_DIR, "asset_index.json")
+
+# Row lifecycle: GENERATING -> RENDERED -> UPLOADED (both platforms); only UPLOADED rows are evictable
+STATES = ("GENERATING", "RENDERED", "UPLOADED")
+PLATFORMS = ("youtube", "insta")
+
+# Per-row files by role. Intermediates can always be regenerated; finals are what was published.
+INTERMEDIATE_PATTERNS = [
+    "row_{id}_scene_*.png", "row_{id}_scene_*.mp4", "vo_row_{id}.mp3", "alignment_row_{id}.json",
+    "subs_row_{id}.ass", "mix_row_{id}.m4a", "mix_row_{id}.json",
+    # language variants (nodes/variants.py)
+    "vo_row_{id}_*.mp3", "alignment_row_{id}_*.json", "mix_row_{id}_*.m4a", "mix_row_{id}_*.json",
+    "script_row_{id}_*.json", "visual_row_{id}.mp4", "visual_row_{id}.json",
+]
+FINAL_PATTERNS = ["Video_Row_{id}.mp4", "Video_Row_{id}_*.mp4", "render_row_{id}.json", "render_row_{id}_*.json"]
+
+_lock = threading.Lock()
+
+
+def _load_index():
+    if not os.path.exists(INDEX_PATH):
+        return {}
+    with open(INDEX_PATH, "r") as f:
+        return json.load(f)
+
+
+def _save_index(index):
+    tmp_path = INDEX_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, INDEX_PATH)
+
+
+def touch(row_id, state=None):
+    """Records that a row's assets were used (LRU clock) and optionally advances its state."""
+    with _lock, file_lock(INDEX_PATH):
+        index = _load_index()
+        entry = index.setdefault(str(row_id), {"state": "GENERATING", "uploaded": {}})
+        entry["last_access"] = time.time()
+        if state and STATES.index(state) >= STATES.index(entry["state"]):
+            entry["state"] = state
+        _save_index(index)
+
+
+def mark_uploaded(row_id, platform):
+    """Flags one platform as done; the row becomes UPLOADED (evictable) once every platform is."""
+    with _lock, file_lock(INDEX_PATH):
+        index = _load_index()
+        entry = index.setdefault(str(row_id), {"state": "RENDERED", "uploaded": {}})
+        entry["uploaded"][platform] = True
+        entry["last_access"] = time.time()
+        if all(entry["uploaded"].get(p) for p in PLATFORMS):
+            entry["state"] = "UPLOADED"
+        _save_index(index)
+
+
+def row_files(row_id, include_finals=False):
+    """Existing files that belong to a row (segments are listed via its render record)."""
+    patterns = INTERMEDIATE_PATTERNS + (FINAL_PATTERNS if include_finals else [])
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(os.path.join(OUTPUT_DIR, pattern.format(id=row_id))))
+    return sorted(files)
+
+
+def row_segments(row_id):
+    render_path = os.path.join(OUTPUT_DIR, f"render_row_{row_id}.json")
+    if not os.path.exists(render_path):
+        return set()
+    with open(render_path, "r") as f:
+        keys = json.load(f).get("segments", [])
+    return {os.path.join(SEGMENT_CACHE_DIR, f"seg_{key}.mp4") for key in keys}
+
+
+def disk_usage(directory=OUTPUT_DIR):
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def gc(quota_bytes=None, dry_run=False, include_finals=False, force=False):
+    """
+    Evicts intermediates of UPLOADED rows, least recently used first, until assets/ fits the quota.
+    With force=True every UPLOADED row is cleaned regardless of quota. Returns the planned removals.
+    """
+    quota_bytes = ASSET_QUOTA_BYTES if quota_bytes is None else quota_bytes
+    with _lock, file_lock(INDEX_PATH):
+        index = _load_index()
+        usage = disk_usage()
+        if not force and usage <= quota_bytes:
+            logger.info(f"🧹 GC: {usage / 1e9:.2f} GB used, within quota of {quota_bytes / 1e9:.2f} GB")
+            return []
+
+        # Segments still referenced by a row that isn't finished must survive
+        live_segments = set()
+        for row_id, entry in index.items():
+            if entry.get("state") != "UPLOADED":
+                live_segments |= row_segments(row_id)
+
+        candidates = sorted(
+            (entry.get("last_access", 0), row_id) for row_id, entry in index.items()
+            if entry.get("state") == "UPLOADED"
+        )
+        removals = []
+        for _, row_id in candidates:
+            if not force and usage <= quota_bytes:
+                break
+            files = row_files(row_id, include_finals) + sorted(row_segments(row_id) - live_segments)
+            for path in files:
+                if not os.path.exists(path):
+                    continue
+                size = os.path.getsize(path)
+                removals.append((row_id, path, size))
+                usage -= size
+                if not dry_run:
+                    os.remove(path)
+            if not dry_run:
+                index[row_id]["evicted_at"] = time.time()
+
+        if not dry_run:
+            _save_index(index)
+
+    freed = sum(size for _, _, size in removals)
+    verb = "Would free" if dry_run else "Freed"
+    logger.info(f"🧹 GC: {verb} {freed / 1e6:.1f} MB across {len({r for r, _, _ in removals})} row(s)")
+    return removals
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.asset_manager gc --dry-run [--quota-gb 5] [--all] [--include-finals]
+    #        python -m utils.asset_manager status
+    parser = argparse.ArgumentParser(description="Zeteon asset lifecycle manager")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc_cmd = sub.add_parser("gc", help="evict intermediates of fully uploaded rows (LRU)")
+    gc_cmd.add_argument("--dry-run", action="store_true")
+    gc_cmd.add_argument("--quota-gb", type=float, default=None)
+    gc_cmd.add_argument("--all", action="store_true", help="clean every UPLOADED row, ignoring the quota")
+    gc_cmd.add_argument("--include-finals", action="store_true", help="also delete published MP4s")
+    sub.add_parser("status", help="per-row state and disk usage")
+    args = parser.parse_args()
+    from utils.logging_setup import setup_logging
+    setup_logging()
+
+    if args.command == "gc":
+        quota = int(args.quota_gb * 1e9) if args.quota_gb is not None else None
+        for row_id, path, size in gc(quota, args.dry_run, args.include_finals, args.all):
+            print(f"{'[dry-run] ' if args.dry_run else ''}row {row_id}: {os.path.relpath(path, OUTPUT_DIR)} ({size / 1e6:.1f} MB)")
+    else:
+        index = _load_index()
+        print(f"assets/: {disk_usage() / 1e9:.2f} GB (quota {ASSET_QUOTA_BYTES / 1e9:.2f} GB)")
+        for row_id, entry in sorted(index.items(), key=lambda kv: int(kv[0])):
+            size = sum(os.path.getsize(p) for p in row_files(row_id, include_finals=True))
+            print(f"row {row_id:>4}: {entry['state']:<10} {size / 1e6:8.1f} MB  uploaded={entry.get('uploaded', {})}")
@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import random
+import hashlib
+import logging
+import subprocess
+
+from utils.ffmpeg_runner import run_ffmpeg
+from utils import manifest
+from utils.manifest import file_digest
+from config import OUTPUT_DIR, MUSIC_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+MUSIC_TARGET_LUFS = -16.0
+MUSIC_BED_GAIN = 0.12
+MIX_BITRATE = "192k"
+DUCKING = "sidechaincompress=threshold=0.05:ratio=12:attack=20:release=200"
+
+
+def list_music_library():
+    """All background tracks shipped in assets/ (bkg_music_*.mp3), in a stable order."""
+    return sorted(
+        os.path.join(OUTPUT_DIR, f) for f in os.listdir(OUTPUT_DIR)
+        if f.lower().startswith("bkg_music") and f.lower().endswith(".mp3")
+    )
+
+
+def pick_music(row_id):
+    """Deterministic per-row pick so re-renders reuse the same cached bed and mix."""
+    library = list_music_library()
+    return random.Random(row_id).choice(library) if library else None
+
+
+def normalize_track(music_path):
+    """Two-pass EBU R128 loudnorm of one library track, cached by its content hash."""
+    key = file_digest(music_path)[:16]
+    name = os.path.splitext(os.path.basename(music_path))[0]
+    norm_path = os.path.join(MUSIC_CACHE_DIR, f"{name}_{key}_norm.m4a")
+    if os.path.exists(norm_path):
+        return norm_path, key
+
+    # Pass 1: measure
+    loudnorm = f"loudnorm=I={MUSIC_TARGET_LUFS}:TP=-2:LRA=11"
+    analysis = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", music_path, "-af", f"{loudnorm}:print_format=json", "-f", "null", "-"],
+        check=True, capture_output=True, text=True, timeout=300
+    )
+    measured = json.loads(re.search(r"\{[^{}]*\"input_i\"[^{}]*\}", analysis.stderr).group(0))
+
+    # Pass 2: apply with the measured values (linear gain, no pumping)
+    with manifest.atomic_output(norm_path) as tmp_path:
+        run_ffmpeg([
+            "ffmpeg", "-y", "-i", music_path,
+            "-af", (
+                f"{loudnorm}:measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+                f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+                f":offset={measured['target_offset']}:linear=true"
+            ),
+            "-ar", "48000", "-c:a", "aac", "-b:a", MIX_BITRATE, tmp_path
+        ], label=f"normalize {name}")
+    logger.info(f"🎚️ Normalized {name} ({measured['input_i']} → {MUSIC_TARGET_LUFS} LUFS)")
+    return norm_path, key
+
+
+def normalize_music_library():
+    """Analyses and normalizes every library track once; later calls are cache hits."""
+    return [normalize_track(path)[0] for path in list_music_library()]
+
+
+def get_music_bed(music_path, length):
+    """Normalized track looped and trimmed to `length` seconds with a 1s fade-out, cached by length."""
+    norm_path, key = normalize_track(music_path)
+    length_ms = int(round(length * 1000))
+    bed_path = os.path.join(MUSIC_CACHE_DIR, f"bed_{key}_{length_ms}ms.m4a")
+    if os.path.exists(bed_path):
+        return bed_path, f"{key}_{length_ms}"
+
+    with manifest.atomic_output(bed_path) as tmp_path:
+        run_ffmpeg([
+            "ffmpeg", "-y", "-stream_loop", "-1", "-i", norm_path,
+            "-af", f"afade=t=out:st={max(0.0, length - 1.0):.3f}:d=1",
+            "-t", f"{length:.3f}", "-c:a", "aac", "-b:a", MIX_BITRATE, tmp_path
+        ], expected_duration=length, label="music bed")
+    return bed_path, f"{key}_{length_ms}"
+
+
+def master_row_audio(row_id, vo_path, pause_at_end, music_path=None, vo_duration=None, suffix=""):
+    """
+    Produces the final VO + ducked music track (AAC) for a row once.
+    Returns (mix_path, mix_key); video renders just mux this file.
+    """
+    # audio_gen recorded the VO's hash and duration once; only unrecorded files are hashed/probed here
+    vo_entry = manifest.get_entry(row_id, vo_path)
+    if vo_duration is None:
+        vo_duration = vo_entry["duration"] if vo_entry and vo_entry.get("duration") else manifest.probe_duration(vo_path)
+    total_dur = vo_duration + pause_at_end
+
+    bed_path, bed_key = get_music_bed(music_path, total_dur) if music_path else (None, None)
+    mix_key = hashlib.sha256(json.dumps({
+        "vo": vo_entry["sha256"] if vo_entry else file_digest(vo_path), "bed": bed_key, "pause": pause_at_end,
+        "gain": MUSIC_BED_GAIN, "ducking": DUCKING, "bitrate": MIX_BITRATE,
+    }, sort_keys=True).encode()).hexdigest()[:24]
+
+    mix_path = os.path.join(OUTPUT_DIR, f"mix_row_{row_id}{suffix}.m4a")
+    key_path = os.path.join(OUTPUT_DIR, f"mix_row_{row_id}{suffix}.json")
+    if manifest.is_valid(row_id, mix_path) and os.path.exists(key_path):
+        with open(key_path, "r") as f:
+            if json.load(f).get("mix_key") == mix_key:
+                logger.info(f"📦 Cache Hit: Mastered audio found for Row {row_id}")
+                return mix_path, mix_key
+
+    cmd = ["ffmpeg", "-y", "-i", vo_path]
+    if bed_path:
+        cmd += ["-i", bed_path]
+        audio_filter = (
+            f"[0:a]apad=pad_dur={pause_at_end},asplit=2[vo_p1][vo_p2];"
+            f"[1:a]volume={MUSIC_BED_GAIN}[bg];"
+            f"[bg][vo_p1]{DUCKING}[bg_duck];"
+            f"[vo_p2][bg_duck]amix=inputs=2:duration=longest:weights=1 1[a_final]"
+        )
+    else:
+        audio_filter = f"[0:a]apad=pad_dur={pause_at_end}[a_final]"
+
+    with manifest.atomic_output(mix_path) as tmp_path:
+        cmd += [
+            "-filter_complex", audio_filter, "-map", "[a_final]",
+            "-c:a", "aac", "-b:a", MIX_BITRATE, "-t", f"{total_dur:.3f}", tmp_path
+        ]
+        run_ffmpeg(cmd, expected_duration=total_dur, label=f"Row {row_id} audio master")
+    manifest.record(row_id, mix_path, duration=total_dur)
+    manifest.atomic_write_json(key_path, {"mix_key": mix_key, "music": os.path.basename(music_path) if music_path else None})
+
+    logger.info(f"🎚️ Mastered audio for Row {row_id}")
+    return mix_path, mix_key
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.audio_master  -> pre-normalize the whole music library
+    from utils.logging_setup import setup_logging
+    setup_logging()
+    for path in normalize_music_library():
+        print(path)
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import socket
+import logging
+import statistics
+
+from config import OUTPUT_DIR, ENCODE_PROFILE, ENCODE_TIME_BUDGET_S
+
+logger = logging.getLogger(__name__)
+
+ENCODE_HISTORY_PATH = os.path.join(OUTPUT_DIR, "encode_history.jsonl")
+
+# Named profiles for the delivered (final pass) libx264 encode
+ENCODE_PROFILES = {
+    "default": {"preset": "veryfast", "crf": 18},   # what every render used before profiles existed
+    "nightly": {"preset": "slow", "crf": 20},       # batch runs: spend CPU for smaller uploads
+    "urgent": {"preset": "ultrafast", "crf": 20},   # re-runs that must land now
+}
+
+# Extra outputs split off the finished filter graph (no second zoompan/xfade/subtitle pass)
+RENDITIONS = {
+    "insta": {
+        "suffix": "_insta", "scale": None,
+        "args": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "veryfast", "-crf", "21",
+                 "-maxrate", "6M", "-bufsize", "12M", "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"],
+    },
+    "preview": {
+        "suffix": "_preview", "scale": (540, 960),
+        "args": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "veryfast", "-crf", "28",
+                 "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart"],
+    },
+}
+
+# Typical x264 encode time relative to veryfast at the same CRF
+RELATIVE_COST = {
+    "ultrafast": 0.35, "superfast": 0.5, "veryfast": 1.0, "faster": 1.35,
+    "fast": 1.8, "medium": 2.3, "slow": 3.6, "slower": 6.5,
+}
+
+# Auto mode walks this ladder (smallest output first) and takes the first rung that fits the budget
+AUTO_LADDER = [("slow", 20), ("medium", 19), ("fast", 18), ("veryfast", 18), ("ultrafast", 20)]
+
+DEFAULT_SPEED_FACTOR = 1.0  # wall seconds per output second at veryfast, until this host has history
+
+
+def load_history(host=None, limit=50):
+    """Returns the most recent encode outcomes, optionally only for one host."""
+    if not os.path.exists(ENCODE_HISTORY_PATH):
+        return []
+    with open(ENCODE_HISTORY_PATH, "r") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if host:
+        records = [r for r in records if r.get("host") == host]
+    return records[-limit:]
+
+
+def host_speed_factor(host=None):
+    """Median wall-seconds per output-second, normalised to veryfast, measured on this host."""
+    host = host or socket.gethostname()
+    samples = [
+        r["wall_s"] / (r["duration_s"] * RELATIVE_COST[r["preset"]])
+        for r in load_history(host)
+        if r.get("duration_s") and r.get("preset") in RELATIVE_COST and not r.get("renditions")
+    ]
+    return statistics.median(samples) if samples else DEFAULT_SPEED_FACTOR
+
+
+def resolve_encode_settings(duration_s, profile=None, budget_s=None):
+    """Maps a profile name (or 'auto') to concrete libx264 settings for a video of this length."""
+    profile = profile or ENCODE_PROFILE
+    if profile != "auto":
+        if profile not in ENCODE_PROFILES:
+            logger.warning(f"⚠️ Unknown encode profile '{profile}', falling back to 'default'")
+            profile = "default"
+        return {"profile": profile, **ENCODE_PROFILES[profile]}
+
+    budget_s = budget_s or ENCODE_TIME_BUDGET_S
+    factor = host_speed_factor()
+    for preset, crf in AUTO_LADDER:
+        predicted = duration_s * factor * RELATIVE_COST[preset]
+        if predicted <= budget_s:
+            break
+    logger.info(
+        f"⚙️ Auto encode: {preset}/crf{crf} (predicted {predicted:.0f}s, "
+        f"budget {budget_s:.0f}s, host factor {factor:.2f})"
+    )
+    return {"profile": "auto", "preset": preset, "crf": crf, "predicted_s": round(predicted, 1)}
+
+
+def x264_args(settings):
+    """ffmpeg output arguments for the resolved settings."""
+    return ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(settings["crf"]), "-preset", settings["preset"]]
+
+
+def record_encode_outcome(settings, duration_s, wall_s, output_path, row_id=None):
+    """Appends the size-versus-time result of one encode so presets can be traded off deliberately."""
+    size_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    record = {
+        "ts": int(time.time()),
+        "host": socket.gethostname(),
+        "row_index": row_id,
+        "profile": settings["profile"],
+        "preset": settings["preset"],
+        "crf": settings["crf"],
+        "renditions": settings.get("renditions", []),
+        "duration_s": round(duration_s, 3),
+        "wall_s": round(wall_s, 3),
+        "realtime_factor": round(duration_s / wall_s, 3) if wall_s else None,
+        "size_bytes": size_bytes,
+        "kbps": round(size_bytes * 8 / 1000 / duration_s, 1) if duration_s else None,
+    }
+    with open(ENCODE_HISTORY_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    logger.info(
+        f"📊 Encode {settings['preset']}/crf{settings['crf']}: {wall_s:.1f}s wall, "
+        f"{size_bytes / 1e6:.1f} MB ({record['kbps']} kbps)"
+    )
+    return record
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.encode_profiles  -> summary of this host's size/time trade-offs
+    host = socket.gethostname()
+    print(f"Host {host} speed factor: {host_speed_factor(host):.2f}")
+    by_preset = {}
+    for r in load_history(host, limit=500):
+        by_preset.setdefault((r["preset"], r["crf"]), []).append(r)
+    for (preset, crf), records in sorted(by_preset.items(), key=lambda kv: RELATIVE_COST.get(kv[0][0], 0)):
+        rtf = statistics.median(r["realtime_factor"] for r in records if r["realtime_factor"])
+        kbps = statistics.median(r["kbps"] for r in records if r["kbps"])
+        print(f"{preset:>10}/crf{crf}: {len(records):>3} runs, {rtf:.2f}x realtime, {kbps:.0f} kbps")
@@ -0,0 +1,114 @@
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+
+from config import FFMPEG_STALL_TIMEOUT_S, FFMPEG_DEADLINE_S
+
+logger = logging.getLogger(__name__)
+
+STDERR_TAIL_LINES = 200
+PROGRESS_LOG_INTERVAL_S = 10
+
+
+class FFmpegStalled(subprocess.TimeoutExpired):
+    """Raised after ffmpeg was killed for making no progress or overrunning its deadline."""
+
+    def __init__(self, cmd, timeout, reason, stderr=None):
+        super().__init__(cmd, timeout, stderr=stderr)
+        self.reason = reason
+
+    def __str__(self):
+        return f"ffmpeg killed ({self.reason}) after {self.timeout:.0f}s"
+
+
+def _parse_out_time(block):
+    """Seconds of output written so far, from a -progress block."""
+    for key in ("out_time_us", "out_time_ms"):  # out_time_ms is also microseconds in ffmpeg
+        value = block.get(key, "")
+        if value.lstrip("-").isdigit():
+            return max(0, int(value)) / 1_000_000
+    return 0.0
+
+
+def run_ffmpeg(cmd, expected_duration=None, label="ffmpeg", stall_timeout=None, deadline=None, on_progress=None):
+    """
+    Runs ffmpeg with -progress on a pipe: logs fps/speed/ETA, kills on stall or deadline,
+    and keeps only the last STDERR_TAIL_LINES of stderr for error reports.
+    """
+    stall_timeout = stall_timeout or FFMPEG_STALL_TIMEOUT_S
+    deadline = deadline or FFMPEG_DEADLINE_S
+    full_cmd = [cmd[0], "-nostats", "-progress", "pipe:1", *cmd[1:]]
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    metrics = {"out_time_s": 0.0, "fps": 0.0, "speed": 0.0, "eta_s": None}
+    last_advance = [time.monotonic()]
+
+    proc = subprocess.Popen(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace")
+
+    def read_stderr():
+        for line in proc.stderr:
+            stderr_tail.append(line.rstrip())
+
+    def read_progress():
+        block, last_log = {}, 0.0
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            if key != "progress":
+                block[key] = value.strip()
+                continue
+
+            out_time = _parse_out_time(block)
+            if out_time > metrics["out_time_s"]:
+                last_advance[0] = time.monotonic()
+            metrics["out_time_s"] = max(out_time, metrics["out_time_s"])
+            speed = block.get("speed", "").rstrip("x").strip()
+            if speed.replace(".", "", 1).isdigit():
+                metrics["speed"] = float(speed)
+            if block.get("fps", "").replace(".", "", 1).isdigit():
+                metrics["fps"] = float(block["fps"])
+            if expected_duration and metrics["speed"] > 0:
+                metrics["eta_s"] = max(0.0, (expected_duration - metrics["out_time_s"]) / metrics["speed"])
+            if on_progress:
+                on_progress(dict(metrics))
+
+            now = time.monotonic()
+            if now - last_log >= PROGRESS_LOG_INTERVAL_S or value == "end":
+                eta = f"{metrics['eta_s']:.0f}s" if metrics["eta_s"] is not None else "?"
+                logger.info(
+                    f"⏱️ {label}: {metrics['out_time_s']:.1f}s done | {metrics['fps']:.1f} fps | "
+                    f"{metrics['speed']:.2f}x | ETA {eta}"
+                )
+                last_log = now
+            block = {}
+
+    readers = [threading.Thread(target=read_stderr, daemon=True), threading.Thread(target=read_progress, daemon=True)]
+    for t in readers:
+        t.start()
+
+    started = time.monotonic()
+    reason = None
+    while proc.poll() is None:
+        now = time.monotonic()
+        if now - last_advance[0] > stall_timeout:
+            reason = f"no progress for {stall_timeout:.0f}s"
+        elif now - started > deadline:
+            reason = f"deadline of {deadline:.0f}s exceeded"
+        if reason:
+            proc.kill()
+            proc.wait()
+            break
+        time.sleep(0.5)
+
+    for t in readers:
+        t.join(timeout=5)
+    tail = "\n".join(stderr_tail).encode()
+    metrics["wall_s"] = time.monotonic() - started
+
+    if reason:
+        logger.error(f"🚨 {label}: killed, {reason}")
+        raise FFmpegStalled(full_cmd, metrics["wall_s"], reason, stderr=tail)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, full_cmd, stderr=tail)
+    return metrics
@@ -0,0 +1,196 @@
+import re
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import datetime
+import threading
+import contextvars
+
+import requests
+
+from utils import ledger
+from utils.sheets import get_worksheet
+from utils.youtube_view_count import get_performance_context
+from config import (
+    IDEA_GENERATION_API_URL, IDEA_SYSTEM_INSTRUCTIONS, IDEA_GENERATION_MODEL,
+    IDEA_LOW_WATERMARK, IDEA_BATCH_MIN, IDEA_BATCH_MAX, IDEA_PREFETCH_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_COLUMN = 10  # 'Trigger Status'
+THROUGHPUT_WINDOW_S = 7 * 86400
+
+_refill_lock = threading.Lock()
+
+
+# --- SHEET SNAPSHOT ---
+def read_queue(sheet_name="ideas"):
+    """One read of the sheet: (worksheet, pending [(sheet_row, idea)], already-used ideas, last used row)."""
+    worksheet = get_worksheet(sheet_name)
+    all_records = worksheet.get_all_values()
+    if not all_records:
+        return worksheet, [], [], 0
+
+    idx_map = {header: i for i, header in enumerate(all_records[0])}
+    idx_trigger = idx_map.get('Trigger Status')
+    idx_idea = idx_map.get('Idea')
+
+    pending, used = [], []
+    for i, row in enumerate(all_records[1:]):
+        trigger_status = row[idx_trigger].strip().upper() if len(row) > idx_trigger else ""
+        if trigger_status != 'TRIGGERED':
+            pending.append((i + 2, row[idx_idea]))
+        else:
+            used.append(row[idx_idea])
+    return worksheet, pending, used, len(all_records)
+
+
+def append_ideas(worksheet, ideas, last_row):
+    """Appends new ideas and returns their (sheet_row, idea) pairs, so callers never re-read the sheet."""
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    response = worksheet.append_rows([[today, idea, '', '', 'NOT-UPLOADED', '', 'NOT-UPLOADED', '', ''] for idea in ideas])
+    # updatedRange looks like "ideas!A12:I14"; fall back to the snapshot's row count
+    match = re.search(r"![A-Z]+(\d+)", str((response or {}).get("updates", {}).get("updatedRange", "")))
+    first_row = int(match.group(1)) if match else last_row + 1
+    logger.info(f"✅ Added {len(ideas)} ideas to Sheet.")
+    return [(first_row + i, idea) for i, idea in enumerate(ideas)]
+
+
+# --- GENERATION ---
+def generate_ideas(avoid_ideas, count=3):
+    """LLM call to generate the next viral science topics."""
+    performance_data = get_performance_context()
+
+    prompt = f"""
+You are the Zeteon Science Lead.
+Your job is to propose exactly {count} **viral, curiosity‑driven science explainer topics** optimized for short‑form video platforms.
+
+Use the following performance context to understand what resonates:
+{performance_data}
+
+Avoid repeating or overlapping with these previously uploaded or queued ideas:
+{avoid_ideas}
+
+Return only valid JSON that matches this structure:
+
+{{
+  "ideas": ["string", "string", ...]
+}}
+"""
+
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "systemInstruction": {"parts": [{"text": IDEA_SYSTEM_INSTRUCTIONS}]},
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": {
+                "type": "object",
+                "properties": {"ideas": {"type": "array", "items": {"type": "string"}}},
+                "required": ["ideas"]
+            }
+        }
+    }
+
+    for attempt in range(3):
+        try:
+            with ledger.track(
+                "gemini", "generateContent", stage="ideas", api_key="Key 1", unit="tokens",
+                model=IDEA_GENERATION_MODEL, attempt=attempt + 1
+            ) as call:
+                resp = requests.post(IDEA_GENERATION_API_URL, json=payload, timeout=60)
+                call["status"] = resp.status_code
+                resp.raise_for_status()
+                body = resp.json()
+                usage = body.get('usageMetadata', {})
+                call["units_in"], call["units_out"] = usage.get('promptTokenCount', 0), usage.get('candidatesTokenCount', 0)
+            data = json.loads(body['candidates'][0]['content']['parts'][0]['text'])
+            seen = {idea.strip().lower() for idea in avoid_ideas}
+            return [idea for idea in data.get('ideas', []) if idea.strip().lower() not in seen][:count]
+        except Exception as e:
+            logger.warning(f"Idea Gen Attempt {attempt+1} failed: {e}")
+            time.sleep(2)
+    return []
+
+
+# --- PREFETCH ---
+def batch_size():
+    """Enough ideas for IDEA_PREFETCH_DAYS at last week's pace (rows the ledger saw), within the batch bounds."""
+    per_day = ledger.rows_started(THROUGHPUT_WINDOW_S) / (THROUGHPUT_WINDOW_S / 86400)
+    return max(IDEA_BATCH_MIN, min(IDEA_BATCH_MAX, math.ceil(per_day * IDEA_PREFETCH_DAYS)))
+
+
+def top_up(sheet_name="ideas", snapshot=None, watermark=IDEA_LOW_WATERMARK):
+    """Generates one batch if fewer than `watermark` ideas are pending. Returns how many were added."""
+    if not _refill_lock.acquire(blocking=False):
+        return 0  # a refill is already in flight in this process
+    try:
+        worksheet, pending, used, last_row = snapshot or read_queue(sheet_name)
+        if len(pending) >= watermark:
+            return 0
+        count = batch_size()
+        logger.info(f"💡 Idea queue at {len(pending)} (low watermark {watermark}). Prefetching {count} ideas...")
+        new_ideas = generate_ideas(used + [idea for _, idea in pending], count)
+        return len(append_ideas(worksheet, new_ideas, last_row)) if new_ideas else 0
+    except Exception as e:
+        logger.error(f"❌ Idea prefetch failed: {e}")
+        return 0
+    finally:
+        _refill_lock.release()
+
+
+def start_prefetch(sheet_name="ideas", snapshot=None):
+    """Tops up the queue on a background thread; join it before the process exits."""
+    # Run in a copy of the caller's context so the thread's log lines keep row_index/node/span_id
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(top_up, sheet_name, snapshot), name="idea-prefetch")
+    thread.start()
+    return thread
+
+
+# --- CLAIM ---
+def get_ready_idea(sheet_name="ideas"):
+    """
+    Claims a pending idea and starts a background top-up when the queue runs low.
+    Returns (job, prefetch_thread); only a completely empty queue generates ideas inline.
+    """
+    try:
+        worksheet, pending, used, last_row = read_queue(sheet_name)
+
+        if not pending:
+            logger.info("Empty queue. Generating ideas before claiming...")
+            new_ideas = generate_ideas(used, batch_size())
+            if not new_ideas:
+                return None, None
+            pending = append_ideas(worksheet, new_ideas, last_row)
+            last_row = max(last_row, pending[-1][0])
+
+        row_num, idea = random.choice(pending)
+        logger.info(f"🎯 Target Idea: {idea} | Row: {row_num}")
+        worksheet.update_cell(row_num, TRIGGER_COLUMN, 'TRIGGERED')
+
+        remaining = [p for p in pending if p[0] != row_num]
+        prefetch = None
+        if len(remaining) < IDEA_LOW_WATERMARK:
+            prefetch = start_prefetch(sheet_name, (worksheet, remaining, used + [idea], last_row))
+        return {"row_index": row_num, "idea": idea}, prefetch
+
+    except Exception as e:
+        logger.error(f"Error in get_ready_idea: {str(e)}")
+        return None, None
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.idea_queue top-up [--watermark 5]   (cron / daemon loop, outside any render)
+    from utils.logging_setup import setup_logging
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Zeteon idea queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refill = sub.add_parser("top-up", help="generate a batch of ideas if the pending queue is below the watermark")
+    refill.add_argument("--sheet", default="ideas")
+    refill.add_argument("--watermark", type=int, default=IDEA_LOW_WATERMARK)
+    args = parser.parse_args()
+    print(f"Added {top_up(args.sheet, watermark=args.watermark)} ideas")
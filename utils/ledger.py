@@ -0,0 +1,184 @@
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from config import (
+    LEDGER_PATH, CLAUDE_MODEL, IDEA_GENERATION_MODEL, VIDEO_METADATA_GENERATION_MODEL, IMAGEN_MODEL, VEO_MODEL_NAME
+)
+
+logger = logging.getLogger(__name__)
+
+# Row being produced; set once per job in main.py and inherited by nodes, threads and tasks
+current_row = contextvars.ContextVar("ledger_row", default=None)
+# Attempt number of the call about to be made, set by tenacity's `before` hook (see note_attempt)
+_attempt = contextvars.ContextVar("ledger_attempt", default=1)
+
+# USD per billed unit; tokens are priced per million, characters per thousand
+PRICING = {
+    ("anthropic", CLAUDE_MODEL): {"in": 3.00 / 1e6, "out": 15.00 / 1e6},
+    ("gemini", IDEA_GENERATION_MODEL): {"in": 0.30 / 1e6, "out": 2.50 / 1e6},
+    ("gemini", VIDEO_METADATA_GENERATION_MODEL): {"in": 0.10 / 1e6, "out": 0.40 / 1e6},
+    ("imagen", IMAGEN_MODEL): {"out": 0.06},
+    ("veo", VEO_MODEL_NAME): {"out": 0.40},  # per generated second
+    ("elevenlabs", "eleven_multilingual_v2"): {"in": 0.30 / 1e3},
+}
+
+# YouTube Data API quota cost per method (10,000 units/day by default)
+YOUTUBE_QUOTA = {"videos.insert": 1600, "videos.list": 1, "commentThreads.insert": 50, "search.list": 100}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    row_id INTEGER,
+    stage TEXT,
+    provider TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    api_key TEXT,
+    attempt INTEGER NOT NULL DEFAULT 1,
+    status TEXT,
+    latency_ms REAL,
+    unit TEXT,
+    units_in REAL DEFAULT 0,
+    units_out REAL DEFAULT 0,
+    cost_usd REAL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_api_calls_row ON api_calls (row_id);
+"""
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(LEDGER_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def note_attempt(retry_state):
+    """tenacity `before` hook: lets the next recorded call know which attempt it is."""
+    _attempt.set(retry_state.attempt_number)
+
+
+def price(provider, model, units_in=0, units_out=0):
+    rates = PRICING.get((provider, model), {})
+    return units_in * rates.get("in", 0) + units_out * rates.get("out", 0)
+
+
+def record(provider, endpoint, stage=None, row_id=None, api_key=None, attempt=None, status="ok",
+           latency_ms=None, unit=None, units_in=0, units_out=0, model=None, error=None):
+    """Appends one API call. Never raises: the ledger must not be able to fail a video."""
+    if attempt is None:
+        attempt = _attempt.get()
+        _attempt.set(1)
+    row_id = current_row.get() if row_id is None else row_id
+    cost = price(provider, model or endpoint, units_in, units_out)
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute(
+                "INSERT INTO api_calls (ts, row_id, stage, provider, endpoint, api_key, attempt, status,"
+                " latency_ms, unit, units_in, units_out, cost_usd, error) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                (time.time(), row_id, stage, provider, endpoint, api_key, attempt, str(status),
+                 latency_ms, unit, units_in, units_out, cost, (error or "")[:300] or None)
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Ledger write failed: {e}")
+
+
+@contextmanager
+def track(provider, endpoint, stage=None, row_id=None, api_key=None, unit=None, model=None, attempt=None, units_in=0):
+    """
+    Times one external call and records it, including failures. The yielded dict takes the
+    response details: with ledger.track(...) as call: ...; call["status"] = 200; call["units_out"] = n
+    """
+    call = {"status": "ok", "units_in": units_in, "units_out": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        if call["status"] == "ok":
+            call["status"] = getattr(getattr(e, "response", None), "status_code", None) or "error"
+        call["error"] = call["error"] or f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record(
+            provider, endpoint, stage=stage, row_id=row_id, api_key=api_key, attempt=attempt,
+            status=call["status"], latency_ms=round((time.perf_counter() - start) * 1000, 1),
+            unit=unit, units_in=call["units_in"], units_out=call["units_out"], model=model, error=call["error"]
+        )
+
+
+def rows_started(since_s):
+    """Distinct rows with any API call in the last since_s seconds: the pipeline's recent throughput."""
+    try:
+        with _lock:
+            (count,) = _connection().execute(
+                "SELECT COUNT(DISTINCT row_id) FROM api_calls WHERE row_id IS NOT NULL AND ts >= ?",
+                (time.time() - since_s,)
+            ).fetchone()
+        return count
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Ledger read failed: {e}")
+        return 0
+
+
+# --- REPORTING ---
+REPORT_GROUPS = {
+    "row": "row_id",
+    "stage": "stage",
+    "provider": "provider || ' ' || endpoint",
+    "key": "provider || ' ' || COALESCE(api_key, '-')",
+    "row-stage": "row_id || ' ' || COALESCE(stage, '-')",
+}
+
+
+def summarize(group_by="row", row_id=None, since_s=None):
+    """Calls, retries, failures, billed units, cost and time per group."""
+    where, params = [], []
+    if row_id is not None:
+        where.append("row_id = ?")
+        params.append(row_id)
+    if since_s:
+        where.append("ts >= ?")
+        params.append(time.time() - since_s)
+    sql = (
+        f"SELECT {REPORT_GROUPS[group_by]} AS grp, COUNT(*), SUM(attempt > 1),"
+        " SUM(status NOT IN ('ok', '200')), SUM(units_in), SUM(units_out), SUM(cost_usd), SUM(latency_ms)"
+        f" FROM api_calls {'WHERE ' + ' AND '.join(where) if where else ''}"
+        " GROUP BY grp ORDER BY SUM(cost_usd) DESC"
+    )
+    with _lock:
+        return _connection().execute(sql, params).fetchall()
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.ledger report [--by row|stage|provider|key|row-stage] [--row 12] [--days 7]
+    parser = argparse.ArgumentParser(description="Zeteon API cost & latency ledger")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="cost and time per video / stage / provider")
+    report.add_argument("--by", choices=list(REPORT_GROUPS), default="row")
+    report.add_argument("--row", type=int, default=None)
+    report.add_argument("--days", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = summarize(args.by, args.row, args.days * 86400 if args.days else None)
+    print(f"{args.by:<36} {'calls':>6} {'retry':>6} {'fail':>5} {'units in':>12} {'units out':>10} {'USD':>9} {'time s':>9}")
+    total_cost = 0.0
+    for grp, calls, retries, fails, u_in, u_out, cost, latency in rows:
+        total_cost += cost or 0
+        print(
+            f"{str(grp):<36} {calls:>6} {retries or 0:>6} {fails or 0:>5} {u_in or 0:>12.0f} {u_out or 0:>10.0f}"
+            f" {cost or 0:>9.4f} {(latency or 0) / 1000:>9.1f}"
+        )
+    print(f"{'TOTAL':<36} {'':>6} {'':>6} {'':>5} {'':>12} {'':>10} {total_cost:>9.4f}")
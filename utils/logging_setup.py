@@ -0,0 +1,131 @@
+import sys
+import copy
+import json
+import queue
+import atexit
+import asyncio
+import logging
+import secrets
+import datetime
+import functools
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from utils.ledger import current_row
+from config import LOG_LEVEL, LOG_FORMAT, LOG_FILE
+
+TEXT_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Node and span of the code that is logging; row comes from ledger.current_row (set once per job in main.py).
+# asyncio tasks and asyncio.to_thread inherit all three, so concurrent rows never mix up their fields.
+current_node = contextvars.ContextVar("log_node", default=None)
+current_span = contextvars.ContextVar("log_span", default=(None, None))   # (span_id, parent_span_id)
+
+_listener = None
+
+
+# --- CONTEXT ---
+@contextmanager
+def span(name=None):
+    """A child span of whatever is running; with a name it also becomes the node field."""
+    parent_id = current_span.get()[0]
+    span_token = current_span.set((secrets.token_hex(8), parent_id))
+    node_token = current_node.set(name) if name else None
+    try:
+        yield
+    finally:
+        current_span.reset(span_token)
+        if node_token is not None:
+            current_node.reset(node_token)
+
+
+def with_node(name, fn):
+    """Graph node wrapper: every record logged while the node runs carries its name and a fresh span id."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+    return sync_wrapper
+
+
+# --- HANDLERS ---
+class ContextQueueHandler(QueueHandler):
+    """
+    Runs on the calling thread: stamps the context fields and renders the message, then only enqueues.
+    Formatting and the actual stream/file writes happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if getattr(record, "row_index", None) is None:   # an explicit extra={"row_index": ...} wins
+            record.row_index = current_row.get()
+        record.node = current_node.get()
+        record.span_id, record.parent_span_id = current_span.get()
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: the fields the metrics tooling groups by, then the message."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "row_index": getattr(record, "row_index", None),
+            "node": getattr(record, "node", None),
+            "span_id": getattr(record, "span_id", None),
+            "parent_span_id": getattr(record, "parent_span_id", None),
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=None, fmt=None):
+    """The single logging setup for every entry point. Idempotent; LOG_FORMAT=json|text, LOG_FILE adds a file."""
+    global _listener
+    if _listener is not None:
+        return
+    formatter = JsonFormatter() if (fmt or LOG_FORMAT) == "json" else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(WatchedFileHandler(LOG_FILE))   # plays well with logrotate
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Unbounded queue: a log call never waits on stdout, a slow disk or a full pipe
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(ContextQueueHandler(log_queue))
+    root.setLevel(level or LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Drains the queue; registered atexit so the last records of a run are never lost."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
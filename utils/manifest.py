@@ -0,0 +1,170 @@
+import os
+import json
+import uuid
+import fcntl
+import shutil
+import hashlib
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+
+from config import OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = (".mp3", ".mp4", ".m4a", ".wav")
+
+_lock = threading.Lock()
+
+
+# --- ATOMIC WRITES (temp file in the same directory + os.replace) ---
+def tmp_path_for(path):
+    """Unique per call, so two writers of the same target (workers, threads) never share a temp file."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}-{uuid.uuid4().hex[:12]}.tmp{ext}"  # keep the extension for ffmpeg's muxer
+
+@contextmanager
+def atomic_output(path):
+    """Yields a temp path to write to; it only replaces `path` if the block completes."""
+    tmp = tmp_path_for(path)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def atomic_write_bytes(path, data):
+    with atomic_output(path) as tmp:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+def atomic_write_json(path, obj):
+    atomic_write_bytes(path, json.dumps(obj).encode("utf-8"))
+
+def atomic_copy(src, dst):
+    with atomic_output(dst) as tmp:
+        shutil.copyfile(src, tmp)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive fcntl lock on `<path>.lock` for a read-modify-write of a file that render workers on other
+    processes/hosts also update. POSIX locks are per process, so callers still hold their threading lock.
+    """
+    with open(f"{path}.lock", "a") as f:
+        fcntl.lockf(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(f, fcntl.LOCK_UN)
+
+
+# --- HASHING & PROBING (only ever done at write time or for one-off legacy adoption) ---
+def file_digest(path):
+    """Streams a file through SHA-256."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def probe_duration(path):
+    out = subprocess.check_output([
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", path
+    ])
+    return float(out)
+
+
+# --- LEGACY ADOPTION CHECKS (files written before manifests existed) ---
+def png_complete(path):
+    """A fully written PNG ends with the IEND chunk."""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - 12))
+        return f.read().endswith(b"IEND\xaeB`\x82")
+
+def json_complete(path):
+    try:
+        with open(path, "r") as f:
+            json.load(f)
+        return True
+    except (ValueError, OSError):
+        return False
+
+def media_complete(path):
+    try:
+        return probe_duration(path) > 0
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        return False
+
+
+# --- PER-ROW MANIFEST ---
+def manifest_path(row_id):
+    return os.path.join(OUTPUT_DIR, f"manifest_row_{row_id}.json")
+
+def load_manifest(row_id):
+    path = manifest_path(row_id)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except ValueError:
+        logger.warning(f"⚠️ Manifest for Row {row_id} is corrupt, treating all assets as unverified.")
+        return {}
+
+def record(row_id, path, duration=None, digest=None, pair=None):
+    """
+    Registers a freshly (atomically) written asset: size, mtime, SHA-256 and media duration.
+    `pair` is the sha256 of a file this one was produced together with (alignment -> its voiceover).
+    """
+    st = os.stat(path)
+    if duration is None and path.lower().endswith(MEDIA_EXTENSIONS):
+        duration = probe_duration(path)
+    entry = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": digest or file_digest(path),
+        "duration": duration,
+    }
+    if pair:
+        entry["pair"] = pair
+    with _lock, file_lock(manifest_path(row_id)):
+        manifest = load_manifest(row_id)
+        manifest[os.path.basename(path)] = entry
+        atomic_write_json(manifest_path(row_id), manifest)
+    return entry
+
+def forget(row_id, path):
+    with _lock, file_lock(manifest_path(row_id)):
+        manifest = load_manifest(row_id)
+        if manifest.pop(os.path.basename(path), None) is not None:
+            atomic_write_json(manifest_path(row_id), manifest)
+
+def get_entry(row_id, path, manifest=None, adopt=None):
+    """
+    The manifest entry for `path` if the file on disk still matches it (stat only, no decoding).
+    Files that predate manifests are adopted once if the `adopt` check passes.
+    """
+    if not os.path.exists(path):
+        return None
+    manifest = load_manifest(row_id) if manifest is None else manifest
+    entry = manifest.get(os.path.basename(path))
+    if entry:
+        st = os.stat(path)
+        if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+            return entry
+        logger.warning(f"⚠️ {os.path.basename(path)} changed since it was recorded, ignoring cache.")
+        return None
+    if adopt and adopt(path):
+        logger.info(f"📥 Adopting pre-manifest asset {os.path.basename(path)}")
+        return record(row_id, path)
+    return None
+
+def is_valid(row_id, path, manifest=None, adopt=None):
+    return get_entry(row_id, path, manifest, adopt) is not None
@@ -0,0 +1,65 @@
+# Motion parameters shared by every engine (part of each segment cache key)
+SOURCE_WIDTH = 2160
+RESOLUTION = (1080, 1920)
+ZOOM_FPS = 25            # zoompan output rate (its default, which our renders have always used)
+FRAME_BUDGET_FPS = 30    # zoompan d= is budgeted at 30 frames per second of scene
+ZOOM_STEP, ZOOM_MAX = 0.001, 1.5
+
+MOTION_ENGINES = ("zoompan", "scale_crop")
+ENGINE_REVISIONS = {"scale_crop": 2}  # bump when an engine's pixels change, so cached segments are re-rendered
+
+
+def zoompan_motion(duration):
+    """Reference engine: upscale to 2160 wide and evaluate zoompan expressions per frame."""
+    width, height = RESOLUTION
+    input_args = ["-loop", "1", "-t", f"{duration:.3f}"]
+    v_filter = (
+        f"scale={SOURCE_WIDTH}:-1,format=yuv420p,fps={FRAME_BUDGET_FPS},"
+        f"zoompan=z='min(zoom+{ZOOM_STEP},{ZOOM_MAX})':d={int(duration*FRAME_BUDGET_FPS)}"
+        f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={width}x{height}:fps={ZOOM_FPS}"
+    )
+    return input_args, v_filter
+
+
+def scale_crop_motion(duration):
+    """
+    Fast engine: decode the still once and repeat it inside the graph (no PNG decode per frame, which
+    is what `-loop 1` costs), then scale it to the zoomed output size each frame and centre-crop.
+    Frame n shows the same window as zoompan's min(zoom+step,max), without the 2160 upscale.
+    """
+    width, height = RESOLUTION
+    zoom = f"min(1+{ZOOM_STEP}*(n+1),{ZOOM_MAX})"
+    zoomed_w, zoomed_h = f"trunc({width}*{zoom}/2)*2", f"trunc({height}*{zoom}/2)*2"
+    input_args = ["-framerate", str(ZOOM_FPS)]  # one frame; the caller's output -t ends the loop
+    v_filter = (
+        "format=yuv420p,loop=loop=-1:size=1,setpts=N/FRAME_RATE/TB,"
+        f"scale=w='{zoomed_w}':h='{zoomed_h}':eval=frame:flags=bicubic,"
+        # crop's default centring uses the first frame's size, so the offsets follow the zoom explicitly
+        f"crop=w={width}:h={height}:x='({zoomed_w}-{width})/2':y='({zoomed_h}-{height})/2':exact=1,"
+        f"setsar=1,fps={ZOOM_FPS}"
+    )
+    return input_args, v_filter
+
+
+def clip_fit(duration):
+    """
+    Generated video clips (Veo): cover-scale and centre-crop to the output frame at the segment rate,
+    holding the last frame if the clip is shorter than its scene, so it crossfades like any still.
+    """
+    width, height = RESOLUTION
+    v_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},"
+        f"fps={ZOOM_FPS},setsar=1,format=yuv420p,tpad=stop_mode=clone:stop_duration={duration:.3f}"
+    )
+    return [], v_filter
+
+
+def motion_args(engine, duration):
+    """Returns (input_args, video_filter) for one scene source (a still, or a clip with engine="clip")."""
+    if engine == "clip":
+        return clip_fit(duration)
+    if engine == "scale_crop":
+        return scale_crop_motion(duration)
+    if engine != "zoompan":
+        raise ValueError(f"Unknown motion engine '{engine}', expected one of {MOTION_ENGINES}")
+    return zoompan_motion(duration)
@@ -0,0 +1,136 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A check receives the handles of every due job on one platform and returns one
+# (state, payload) per handle, where state is "pending", "done" or "error".
+CheckFn = Callable[[List[Any]], Awaitable[List[Tuple[str, Any]]]]
+
+
+class RemoteJobFailed(Exception):
+    """The remote platform reported that the job failed."""
+
+
+@dataclass
+class Platform:
+    check: CheckFn
+    schedule: List[float]        # delay before each poll; the last value repeats
+    max_batch: int = 1           # how many job handles one check call may carry
+
+
+@dataclass
+class Job:
+    platform: str
+    job_id: str
+    handle: Any
+    future: asyncio.Future
+    next_due: float
+    polls: int = 0
+    on_complete: Optional[Callable[[Any], None]] = None
+    label: str = ""
+    waiters: int = 0
+
+
+@dataclass
+class RemoteJobPoller:
+    """One polling loop for every outstanding remote job (YouTube processing, IG containers, Veo ops)."""
+    platforms: Dict[str, Platform] = field(default_factory=dict)
+    jobs: Dict[Tuple[str, str], Job] = field(default_factory=dict)
+    _task: Optional[asyncio.Task] = None
+    _wakeup: Optional[asyncio.Event] = None
+
+    def register_platform(self, name, check, schedule, max_batch=1):
+        self.platforms[name] = Platform(check=check, schedule=list(schedule), max_batch=max_batch)
+
+    async def wait(self, platform, job_id, handle=None, timeout=None, on_complete=None, label=""):
+        """Tracks a remote job until it completes; returns the platform payload or raises."""
+        if platform not in self.platforms:
+            raise KeyError(f"No poller registered for platform '{platform}'")
+        self._ensure_running()
+
+        key = (platform, job_id)
+        if key not in self.jobs:
+            loop = asyncio.get_running_loop()
+            self.jobs[key] = Job(
+                platform=platform, job_id=job_id, handle=handle if handle is not None else job_id,
+                future=loop.create_future(), next_due=time.monotonic() + self.platforms[platform].schedule[0],
+                on_complete=on_complete, label=label or job_id,
+            )
+            self._wakeup.set()
+
+        job = self.jobs[key]
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout)
+        finally:
+            # Timed out or cancelled: stop polling once nobody waits, so a later wait() starts a fresh job
+            job.waiters -= 1
+            if not job.future.done() and job.waiters == 0 and self.jobs.get(key) is job:
+                self.jobs.pop(key)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self.jobs:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            next_due = min(job.next_due for job in self.jobs.values())
+            if next_due > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), next_due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due_by_platform: Dict[str, List[Job]] = {}
+            for job in list(self.jobs.values()):
+                if job.next_due <= now:
+                    due_by_platform.setdefault(job.platform, []).append(job)
+
+            await asyncio.gather(*(
+                self._poll_batch(self.platforms[name], batch[i:i + self.platforms[name].max_batch])
+                for name, batch in due_by_platform.items()
+                for i in range(0, len(batch), self.platforms[name].max_batch)
+            ))
+
+    async def _poll_batch(self, platform, batch):
+        try:
+            results = await platform.check([job.handle for job in batch])
+        except Exception as e:
+            logger.warning(f"⚠️ Poll of {len(batch)} {batch[0].platform} job(s) failed: {e}")
+            results = [("pending", None)] * len(batch)
+
+        for job, (state, payload) in zip(batch, results):
+            if state == "pending":
+                job.polls += 1
+                delay = platform.schedule[min(job.polls, len(platform.schedule) - 1)]
+                job.next_due = time.monotonic() + delay
+                logger.info(f"⏳ {job.platform} {job.label}: still processing (poll {job.polls}, next in {delay:.0f}s)")
+                continue
+
+            self.jobs.pop((job.platform, job.job_id), None)
+            if job.future.done():
+                continue
+            if state == "done":
+                job.future.set_result(payload)
+                if job.on_complete:
+                    job.on_complete(payload)
+            else:
+                job.future.set_exception(RemoteJobFailed(payload))
+
+
+# Process-wide instance shared by every row and node
+poller = RemoteJobPoller()
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import cProfile
+import logging
+import pstats
+import functools
+import threading
+import statistics
+from collections import Counter
+
+from config import PROFILE_NODES, PROFILE_MODE, PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_S, LOOP_LAG_WARN_S
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+
+_settings = {"nodes": PROFILE_NODES, "mode": PROFILE_MODE}
+_run_dir = None
+_run_lock = threading.Lock()
+
+
+def configure(nodes=None, mode=None):
+    """CLI override of PROFILE_NODES / PROFILE_MODE; must run before build_workflow()."""
+    if nodes is not None:
+        _settings["nodes"] = [n.strip() for n in nodes.split(",") if n.strip()] if isinstance(nodes, str) else list(nodes)
+    if mode is not None:
+        _settings["mode"] = mode
+
+
+def enabled_for(name):
+    return "all" in _settings["nodes"] or name in _settings["nodes"]
+
+
+def run_dir():
+    """One directory per process run: profiles/<timestamp>_<pid>/."""
+    global _run_dir
+    with _run_lock:
+        if _run_dir is None:
+            _run_dir = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+            os.makedirs(_run_dir, exist_ok=True)
+            logger.info(f"🔬 Profiling output: {_run_dir}")
+    return _run_dir
+
+
+# --- SAMPLING PROFILER (collapsed stacks, the input format of flamegraph.pl / speedscope) ---
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer; cheap enough to leave on for a whole node."""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_self(self, limit=25):
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+# --- EVENT-LOOP LAG ---
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up: any lag means something blocked the event loop."""
+
+    def __init__(self, interval=0.05, warn_s=LOOP_LAG_WARN_S, label="loop"):
+        self.interval = interval
+        self.warn_s = warn_s
+        self.label = label
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            if lag >= self.warn_s:
+                logger.warning(f"🐢 Event loop blocked for {lag * 1000:.0f} ms during {self.label}")
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self):
+        if not self.samples:
+            return {"samples": 0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(statistics.median(ordered) * 1000, 2),
+            "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            "blocked_over_warn": sum(lag >= self.warn_s for lag in ordered),
+        }
+
+
+# --- NODE WRAPPER ---
+class _NodeProfile:
+    def __init__(self, name, state=None):
+        row_id = state.get("row_index") if isinstance(state, dict) else None
+        self.name = f"{name}_row_{row_id}" if row_id is not None else name
+        self.mode = _settings["mode"]
+        self.profiler = cProfile.Profile() if self.mode == "cprofile" else None
+        self.sampler = StackSampler(threading.get_ident())
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler:
+            self.profiler.disable()
+        self.sampler.stop()
+        self.wall_s = time.perf_counter() - self.started
+        return False
+
+    def write(self, extra=None):
+        out = run_dir()
+        base = os.path.join(out, self.name)
+        self.sampler.write_collapsed(f"{base}.collapsed")
+        with open(f"{base}.txt", "w") as f:
+            f.write(f"{self.name}: {self.wall_s:.3f}s wall, {sum(self.sampler.stacks.values())} samples\n\n")
+            f.write("Top frames by self samples:\n")
+            for frame, count in self.sampler.top_self():
+                f.write(f"{count:>8}  {frame}\n")
+            if self.profiler:
+                self.profiler.dump_stats(f"{base}.prof")
+                f.write("\nDeterministic profile (cumulative):\n")
+                pstats.Stats(self.profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(out, "nodes.jsonl"), "a") as f:
+            f.write(json.dumps({"node": self.name, "mode": self.mode, "wall_s": round(self.wall_s, 3), **(extra or {})}) + "\n")
+        logger.info(f"🔬 Profiled {self.name}: {self.wall_s:.2f}s -> {base}.collapsed")
+
+
+def watch_loop(name, fn):
+    """Async nodes only: reports event-loop stalls while the node runs (LOOP_LAG_WARN_S=0 disables)."""
+    if not asyncio.iscoroutinefunction(fn) or LOOP_LAG_WARN_S <= 0:
+        return fn
+
+    @functools.wraps(fn)
+    async def lag_wrapper(*args, **kwargs):
+        lag = LoopLagMonitor(label=name).start()
+        try:
+            await asyncio.sleep(0)
+            return await fn(*args, **kwargs)
+        finally:
+            await lag.stop()
+            summary = lag.summary()
+            if summary.get("blocked_over_warn"):
+                logger.warning(
+                    f"🐢 {name}: event loop stalled {summary['blocked_over_warn']}x "
+                    f"(p95 {summary['p95_ms']} ms, max {summary['max_ms']} ms)"
+                )
+            else:
+                logger.debug(f"{name} loop lag: {summary}")
+    return lag_wrapper
+
+
+def wrap(name, fn):
+    """Returns fn unchanged unless profiling is enabled for this node name (async nodes keep the lag watch)."""
+    if not enabled_for(name):
+        return watch_loop(name, fn)
+    if _settings["mode"] not in PROFILE_MODES:
+        logger.warning(f"⚠️ Unknown PROFILE_MODE '{_settings['mode']}', using 'sample'")
+        _settings["mode"] = "sample"
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            # Samples the loop thread, so concurrent tasks show up too; that is what the node waited on
+            prof, lag = _NodeProfile(name, args[0] if args else None), LoopLagMonitor(label=name).start()
+            try:
+                await asyncio.sleep(0)  # let the monitor take its first timestamp before the node runs
+                with prof:
+                    return await fn(*args, **kwargs)
+            finally:
+                await lag.stop()
+                prof.write({"loop_lag": lag.summary()})
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(*args, **kwargs):
+        prof = _NodeProfile(name, args[0] if args else None)
+        try:
+            with prof:
+                return fn(*args, **kwargs)
+        finally:
+            prof.write()
+    return sync_wrapper
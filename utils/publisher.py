@@ -0,0 +1,203 @@
+import os
+import re
+import ipaddress
+import shutil
+import logging
+import mimetypes
+import threading
+import subprocess
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+from urllib.parse import urlparse
+
+from utils.manifest import file_digest
+from config import (
+    ASSET_PUBLISHER, PUBLISH_DIR, PUBLISH_HOST, PUBLISH_PORT, PUBLIC_BASE_URL, PUBLISH_AUTOSTART,
+    S3_ENDPOINT_URL, S3_BUCKET, S3_PREFIX, S3_PUBLIC_BASE_URL
+)
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(file_path):
+    """Content-addressed object key: <sha256 prefix>/<original name>."""
+    return f"{file_digest(file_path)[:20]}/{os.path.basename(file_path)}"
+
+
+class AssetPublisher:
+    """Makes a local file reachable at a public URL (Instagram pulls videos by URL)."""
+    name = "base"
+
+    def publish(self, file_path):
+        raise NotImplementedError
+
+
+class GitPublisher(AssetPublisher):
+    """Legacy backend: commit the MP4 and push, then serve it via raw.githubusercontent.com."""
+    name = "git"
+    GITHUB_USER, GITHUB_REPO, GITHUB_BRANCH = "polarityreverse", "Content-Creation", "master"
+
+    def publish(self, file_path):
+        subprocess.run(["git", "add", file_path], check=True, capture_output=True)
+        # A retried row's asset is already committed: nothing staged means skip the commit, still push
+        if subprocess.run(["git", "diff", "--cached", "--quiet"], capture_output=True).returncode != 0:
+            subprocess.run(["git", "commit", "-m", f"Upload {os.path.basename(file_path)}"], check=True, capture_output=True)
+        else:
+            logger.info(f"Git: {os.path.basename(file_path)} already committed")
+        subprocess.run(["git", "push", "origin", self.GITHUB_BRANCH], check=True, capture_output=True)
+        logger.info(f"Git: {os.path.basename(file_path)} pushed to branch {self.GITHUB_BRANCH}")
+        return (
+            f"https://raw.githubusercontent.com/{self.GITHUB_USER}/{self.GITHUB_REPO}/"
+            f"{self.GITHUB_BRANCH}/assets/{os.path.basename(file_path)}"
+        )
+
+
+class S3Publisher(AssetPublisher):
+    """S3-compatible object store (AWS S3, MinIO, ...); identical content is never re-uploaded."""
+    name = "s3"
+
+    def __init__(self):
+        import boto3  # optional dependency, only needed for this backend
+        self.client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL or None)
+
+    def publish(self, file_path):
+        key = f"{S3_PREFIX}{content_key(file_path)}"
+        try:
+            self.client.head_object(Bucket=S3_BUCKET, Key=key)
+            logger.info(f"📦 S3: {key} already published")
+        except self.client.exceptions.ClientError:
+            content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+            self.client.upload_file(file_path, S3_BUCKET, key, ExtraArgs={"ContentType": content_type})
+            logger.info(f"☁️ S3: uploaded {key}")
+        base = S3_PUBLIC_BASE_URL or f"{(S3_ENDPOINT_URL or 'https://s3.amazonaws.com').rstrip('/')}/{S3_BUCKET}"
+        return f"{base.rstrip('/')}/{key}"
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler with single-range (206) support, which video fetchers rely on."""
+    _range = None
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def send_head(self):
+        self._range = None
+        path = self.translate_path(self.path)
+        match = re.match(r"bytes=(\d*)-(\d*)$", (self.headers.get("Range") or "").strip())
+        if not match or not os.path.isfile(path) or match.groups() == ("", ""):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        first, last = match.groups()
+        if first == "":
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start, end = int(first), min(int(last) if last else size - 1, size - 1)
+        if start >= size or start > end:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Last-Modified", self.date_time_string(int(os.path.getmtime(path))))
+        self.end_headers()
+        self._range = (start, end)
+        return f
+
+    def copyfile(self, source, outputfile):
+        if not self._range:
+            return super().copyfile(source, outputfile)
+        remaining = self._range[1] - self._range[0] + 1
+        while remaining > 0:
+            chunk = source.read(min(64 * 1024, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve(directory=PUBLISH_DIR, host=PUBLISH_HOST, port=PUBLISH_PORT, background=False):
+    """Starts the static server over the publish directory (in a daemon thread if background)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            os.makedirs(directory, exist_ok=True)
+            _server = ThreadingHTTPServer((host, port), partial(RangeRequestHandler, directory=directory))
+            logger.info(f"🌐 Static publisher serving {directory} on http://{host}:{port}")
+            if background:
+                threading.Thread(target=_server.serve_forever, daemon=True).start()
+    if not background:
+        _server.serve_forever()
+    return _server
+
+
+def check_public_base_url(url):
+    """Instagram pulls the video from Meta's servers; refuses URLs they could never reach."""
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        raise ValueError("ASSET_PUBLISHER=local needs PUBLIC_BASE_URL (the server's public address)")
+    try:
+        ip = ipaddress.ip_address(host)
+        unreachable = ip.is_loopback or ip.is_private or ip.is_unspecified or ip.is_link_local
+    except ValueError:
+        unreachable = host == "localhost" or host.endswith((".localhost", ".local", ".internal"))
+    if unreachable:
+        raise ValueError(f"PUBLIC_BASE_URL {url} is not reachable from Meta's servers; use the server's public address")
+
+
+class LocalHTTPPublisher(AssetPublisher):
+    """
+    Places files under PUBLISH_DIR/<content key> and serves them with range requests. The server has to
+    outlive the uploads that pull from it, so it normally runs standalone (python -m utils.publisher).
+    """
+    name = "local"
+
+    def __init__(self):
+        check_public_base_url(PUBLIC_BASE_URL)
+
+    def publish(self, file_path):
+        key = content_key(file_path)
+        dest = os.path.join(PUBLISH_DIR, key)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp = dest + ".tmp"
+            try:
+                os.link(file_path, tmp)  # same volume: no copy at all
+            except OSError:
+                shutil.copyfile(file_path, tmp)
+            os.replace(tmp, dest)
+        if PUBLISH_AUTOSTART:
+            if _server is None:
+                logger.warning("⚠️ Serving published assets from this process: URLs stop resolving when the run exits")
+            serve(background=True)
+        return f"{PUBLIC_BASE_URL.rstrip('/')}/{key}"
+
+
+PUBLISHERS = {"git": GitPublisher, "s3": S3Publisher, "local": LocalHTTPPublisher}
+
+
+def get_publisher(name=None):
+    """The configured backend; raises ValueError for a setup that could never hand out a reachable URL."""
+    name = name or ASSET_PUBLISHER
+    if name not in PUBLISHERS:
+        raise ValueError(f"Unknown asset publisher '{name}', expected one of {list(PUBLISHERS)}")
+    return PUBLISHERS[name]()
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.publisher  -> run the static server in the foreground
+    from utils.logging_setup import setup_logging
+    setup_logging()
+    serve()
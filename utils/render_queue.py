@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+
+from config import RENDER_QUEUE_PATH, RENDER_LEASE_S, RENDER_MAX_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+# One row per render job. The queue lives on storage shared by the orchestrator and every worker
+# (next to ASSETS_DIR), so a claim is a single IMMEDIATE transaction rather than a broker round-trip.
+# That needs working POSIX byte-range locks on the share (NFSv4, or NFSv3 with lockd; not `nolock`
+# mounts). WAL is deliberately not used: its -shm index only works between processes on one host.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS render_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_id INTEGER NOT NULL,
+    spec_key TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    claimed REAL,
+    heartbeat REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_render_jobs_status ON render_jobs (status, created);
+"""
+
+ACTIVE = ("queued", "running")
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(RENDER_QUEUE_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+        _conn.execute("PRAGMA journal_mode=DELETE")  # rollback journal: locking is plain fcntl, safe across hosts
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def spec_key(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def submit(row_id, spec):
+    """Queues a render job, or returns the active job already queued for the same spec (retried runs)."""
+    key = spec_key(spec)
+    with _lock:
+        conn = _connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = conn.execute(
+                f"SELECT id FROM render_jobs WHERE spec_key = ? AND status IN {ACTIVE} ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+            if existing:
+                conn.execute("COMMIT")
+                return existing[0]
+            job_id = conn.execute(
+                "INSERT INTO render_jobs (row_id, spec_key, spec, created) VALUES (?, ?, ?, ?)",
+                (row_id, key, json.dumps(spec), time.time())
+            ).lastrowid
+            conn.execute("COMMIT")
+            return job_id
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def claim(worker):
+    """
+    Takes the oldest queued job, or a running one whose worker stopped heartbeating for RENDER_LEASE_S.
+    Returns (job_id, spec) or None.
+    """
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                job = conn.execute(
+                    "SELECT id, spec, status, worker, attempts FROM render_jobs"
+                    " WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?)"
+                    " ORDER BY created LIMIT 1", (now - RENDER_LEASE_S,)
+                ).fetchone()
+                if job is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, spec, status, previous, attempts = job
+                if status == "queued" or attempts < RENDER_MAX_ATTEMPTS:
+                    break
+                conn.execute(
+                    "UPDATE render_jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+                    (now, f"lease expired on {previous} after {attempts} attempt(s)", job_id)
+                )
+            conn.execute(
+                "UPDATE render_jobs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                " claimed = ?, heartbeat = ? WHERE id = ?", (worker, now, now, job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    if status == "running":
+        logger.warning(f"♻️ Render job {job_id} reclaimed from {previous} (lease expired)")
+    return job_id, json.loads(spec)
+
+
+def heartbeat(job_id, worker):
+    """Extends the lease; False means the job was reclaimed by another worker and this render is stale."""
+    with _lock:
+        cur = _connection().execute(
+            "UPDATE render_jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker)
+        )
+    return cur.rowcount == 1
+
+
+def complete(job_id, worker, result):
+    with _lock:
+        _connection().execute(
+            "UPDATE render_jobs SET status = 'done', finished = ?, result = ?, error = NULL"
+            " WHERE id = ? AND worker = ?", (time.time(), json.dumps(result), job_id, worker)
+        )
+
+
+def fail(job_id, worker, error):
+    """Requeues the job until RENDER_MAX_ATTEMPTS, then marks it failed for the waiting orchestrator."""
+    with _lock:
+        _connection().execute(
+            "UPDATE render_jobs SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END,"
+            " worker = NULL, finished = ?, error = ? WHERE id = ? AND worker = ?",
+            (RENDER_MAX_ATTEMPTS, time.time(), str(error)[:2000], job_id, worker)
+        )
+
+
+def get(job_id):
+    with _lock:
+        row = _connection().execute(
+            "SELECT status, worker, attempts, result, error FROM render_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    status, worker, attempts, result, error = row
+    return {"status": status, "worker": worker, "attempts": attempts,
+            "result": json.loads(result) if result else None, "error": error}
+
+
+def wait(job_id, timeout, poll_s=2.0):
+    """Blocks until the job is done or failed; raises TimeoutError (the job stays queued for a later run)."""
+    deadline = time.monotonic() + timeout
+    last_status = None
+    while True:
+        job = get(job_id)
+        if job["status"] != last_status:
+            logger.info(f"🛰️ Render job {job_id}: {job['status']}{' on ' + job['worker'] if job['worker'] else ''}")
+            last_status = job["status"]
+        if job["status"] in ("done", "failed"):
+            return job
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"render job {job_id} still {job['status']} after {timeout:.0f}s")
+        time.sleep(poll_s)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.render_queue status [--limit 20]
+    parser = argparse.ArgumentParser(description="Zeteon render job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    status = sub.add_parser("status", help="most recent render jobs")
+    status.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with _lock:
+        rows = _connection().execute(
+            "SELECT id, row_id, status, worker, attempts, created, finished, error FROM render_jobs"
+            " ORDER BY id DESC LIMIT ?", (args.limit,)
+        ).fetchall()
+    print(f"{'job':>5} {'row':>6} {'status':<8} {'worker':<28} {'try':>3} {'took s':>7}  error")
+    for job_id, row_id, job_status, worker, attempts, created, finished, error in rows:
+        took = f"{finished - created:.0f}" if finished else "-"
+        print(f"{job_id:>5} {row_id:>6} {job_status:<8} {worker or '-':<28} {attempts:>3} {took:>7}  {(error or '')[:60]}")
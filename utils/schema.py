@@ -8,13 +8,18 @@ class flowstate(TypedDict):
     # Generated Content
     script: Dict[str, Any]      # The JSON script from Node 1
     image_paths: List[str]      # Paths to local Imagen 3 stills from Node 3
-    video_paths: List[str]      # Paths to local Luma MP4s from Node 4
+    video_paths: List[str]      # Per-scene Veo clips (None = use the still), from nodes/video_gen.py
     vo_path: str                # Path to the final ElevenLabs voiceover
     alignment_data: Dict[str, Any]  # The character-level timestamps from ElevenLabs
+    metadata: Dict[str, Any]    # YouTube/Instagram metadata (generated speculatively, reused on retries)
+    variant_paths: Dict[str, str]  # Localised cuts per language code (nodes/variants.py)
+    validation_issues: List[str]   # Repairs/rejections from the pre-render gate (nodes/validation.py)
+    render_error: str           # Why video_stitching_slideshow failed (reported back by render workers)
     
     # Status Flags
     isscriptgenerated: bool
     isvoicegenerated: bool
     isimagesgenerated: bool
+    isrenderready: bool         # Pre-render validation passed (possibly after repairs)
     isvideogenerated: bool
 
@@ -1,11 +1,15 @@
 import os
+import functools
 import gspread
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 
-gc = gspread.service_account(filename=CREDENTIALS_PATH)
-sh = gc.open("Youtube_Ideas")
+@functools.lru_cache(maxsize=1)
+def get_spreadsheet():
+    """Opens the spreadsheet on first use, so importing a node never needs credentials."""
+    gc = gspread.service_account(filename=CREDENTIALS_PATH)
+    return gc.open("Youtube_Ideas")
 
 def get_worksheet(name):
-    return sh.worksheet(name)
\ No newline at end of file
+    return get_spreadsheet().worksheet(name)
@@ -1,34 +1,71 @@
 import os
 import pickle
+import datetime
+import threading
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from pathlib import Path
 
+SCOPES = [
+    'https://www.googleapis.com/auth/youtube.upload',
+    'https://www.googleapis.com/auth/youtube.force-ssl'
+]
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SECRET_PATH = PROJECT_ROOT / "client_secret.json"
+TOKEN_PATH = PROJECT_ROOT / "token.pickle"
 
-def get_youtube_client():
-    SCOPES = [
-        'https://www.googleapis.com/auth/youtube.upload',
-        'https://www.googleapis.com/auth/youtube.force-ssl'
-    ]
-    creds = None
-    project_root = Path(__file__).resolve().parent.parent
-    secret_path = project_root / "client_secret.json"
-
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+# Refresh this long before Google's expiry so no request ever races an expiring token
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+_creds = None
+_creds_lock = threading.Lock()
+_local = threading.local()  # httplib2 isn't thread-safe: one service object per thread
+
+
+def _save_token(creds):
+    tmp_path = TOKEN_PATH.with_suffix(".pickle.tmp")
+    with open(tmp_path, 'wb') as token:
+        pickle.dump(creds, token)
+    os.replace(tmp_path, TOKEN_PATH)
+
+
+def _needs_refresh(creds):
+    if not creds.valid:
+        return True
+    expiry = getattr(creds, "expiry", None)  # naive UTC datetime in google-auth
+    if expiry is None:
+        return False
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+    return expiry - datetime.datetime.now(datetime.timezone.utc) < REFRESH_MARGIN
+
+
+def get_credentials():
+    """Process-wide OAuth credentials, loaded once and refreshed ahead of expiry."""
+    global _creds
+    with _creds_lock:
+        if _creds is None and TOKEN_PATH.exists():
+            with open(TOKEN_PATH, 'rb') as token:
+                _creds = pickle.load(token)
+
+        if _creds and not _needs_refresh(_creds):
+            return _creds
+
+        if _creds and _creds.refresh_token:
+            _creds.refresh(Request())
         else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                str(secret_path), SCOPES
-            )
-            creds = flow.run_local_server(port=8080, prompt='consent')
+            flow = InstalledAppFlow.from_client_secrets_file(str(SECRET_PATH), SCOPES)
+            _creds = flow.run_local_server(port=8080, prompt='consent')
+        _save_token(_creds)
+        return _creds
 
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
 
-    return build('youtube', 'v3', credentials=creds)
\ No newline at end of file
+def get_youtube_client():
+    """Cached YouTube client: bundled discovery document, shared credentials, one service per thread."""
+    creds = get_credentials()
+    service = getattr(_local, "service", None)
+    if service is None or getattr(_local, "creds", None) is not creds:
+        _local.service = build('youtube', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+        _local.creds = creds
+    return _local.service
@@ -1,4 +1,8 @@
+import logging
 from utils.youtube_auth import get_youtube_client # Assuming your script is here
+from utils import ledger
+
+logger = logging.getLogger(__name__)
 
 def get_performance_context():
     #Fetches Top 5 stats from YT and IG for LLM context.
@@ -15,18 +19,20 @@ def get_performance_context():
             order="viewCount",
             type="video"
         )
-        response = request.execute()
+        with ledger.track("youtube", "search.list", stage="ideas", unit="quota", units_in=ledger.YOUTUBE_QUOTA["search.list"]):
+            response = request.execute()
         
         context_str += "YouTube Successes:\n"
         for item in response.get('items', []):
             title = item['snippet']['title']
             v_id = item['id']['videoId']
             # Get specific view counts
-            v_stats = youtube.videos().list(part="statistics", id=v_id).execute()
+            with ledger.track("youtube", "videos.list", stage="ideas", unit="quota", units_in=ledger.YOUTUBE_QUOTA["videos.list"]):
+                v_stats = youtube.videos().list(part="statistics", id=v_id).execute()
             views = v_stats['items'][0]['statistics'].get('viewCount', 0)
             context_str += f"- {title} ({views} views)\n"
     except Exception as e:
-        print(f"YT Stats Error: {e}")
+        logger.warning(f"⚠️ YT Stats Error: {e}")
 
     return context_str
     
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import time
+import logging
+import argparse
+import threading
+
+from nodes.video_assembly import video_stitching_slideshow
+from utils import ledger, manifest, render_queue
+from utils.logging_setup import setup_logging, span
+from config import OUTPUT_DIR, RENDER_LEASE_S
+
+# Usage: ASSETS_DIR=/mnt/zeteon/assets python -m workers.render_worker [--once] [--poll 5]
+#
+# Stateless render worker: claims jobs from the shared queue (utils/render_queue.py), renders them
+# with the same video_stitching_slideshow code the orchestrator would run locally, and reports the
+# outputs back. Needs ffmpeg and the shared ASSETS_DIR; no API keys or Sheets credentials.
+
+logger = logging.getLogger(__name__)
+
+
+def resolve(path):
+    return os.path.join(OUTPUT_DIR, path) if path else None
+
+
+def check_inputs(row_id, digests):
+    """Refuses to render until this host sees exactly the bytes the orchestrator produced."""
+    for rel, expected in digests.items():
+        path = resolve(rel)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"input not visible on this host: {rel}")
+        if manifest.file_digest(path) != expected:
+            raise ValueError(f"input differs from the submitted one: {rel}")
+
+
+class Heartbeat:
+    """Keeps the job's lease alive while ffmpeg runs; notices if the job was handed to another worker."""
+
+    def __init__(self, job_id, worker):
+        self.job_id, self.worker = job_id, worker
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="render-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RENDER_LEASE_S / 4):
+            if not render_queue.heartbeat(self.job_id, self.worker):
+                self.lost = True
+                logger.warning(f"⚠️ Lost the lease on render job {self.job_id}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_job(job_id, spec, worker):
+    state = dict(spec["state"])
+    row_id = state["row_index"]
+    state["image_paths"] = [resolve(p) for p in state.get("image_paths", [])]
+    state["video_paths"] = [resolve(p) for p in state.get("video_paths", [])]
+    state.update({"render_mode": "local", "publish": False})
+
+    final_path = resolve(spec["outputs"]["final"])
+    before = manifest.get_entry(row_id, final_path)
+    started = time.monotonic()
+    try:
+        check_inputs(row_id, spec["inputs"])
+        with Heartbeat(job_id, worker) as beat:
+            state = video_stitching_slideshow(state)
+        if beat.lost:
+            return  # another worker owns the job now; its result is the one that counts
+        if not state.get("isvideogenerated"):
+            raise RuntimeError(state.get("render_error") or "video_stitching_slideshow reported failure")
+    except Exception as e:
+        logger.error(f"❌ Render job {job_id} (Row {row_id}) failed: {e}")
+        render_queue.fail(job_id, worker, f"{type(e).__name__}: {e}")
+        return
+
+    after = manifest.get_entry(row_id, final_path)
+    render_queue.complete(job_id, worker, {
+        "final_video_path": os.path.relpath(state["final_video_path"], OUTPUT_DIR),
+        "rendition_paths": {
+            name: os.path.relpath(p, OUTPUT_DIR) for name, p in (state.get("rendition_paths") or {}).items()
+        },
+        # Cache hits are not re-published, same as a local render
+        "rendered": not before or not after or before["sha256"] != after["sha256"],
+        "wall_s": round(time.monotonic() - started, 1),
+    })
+    logger.info(f"✅ Render job {job_id} (Row {row_id}) done in {time.monotonic() - started:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeteon render worker")
+    parser.add_argument("--once", action="store_true", help="process at most one job, then exit")
+    parser.add_argument("--poll", type=float, default=5.0, help="seconds between queue checks when idle")
+    args = parser.parse_args()
+
+    worker = render_queue.worker_name()
+    logger.info(f"🛠️ Render worker {worker} watching {render_queue.RENDER_QUEUE_PATH}")
+    while True:
+        job = render_queue.claim(worker)
+        if job is None:
+            if args.once:
+                return
+            time.sleep(args.poll)
+            continue
+        job_id, spec = job
+        # Worker logs carry the row and a per-job span, like the orchestrator's node logs
+        ledger.current_row.set(spec["state"]["row_index"])
+        with span("render_worker"):
+            logger.info(f"🎬 Claimed render job {job_id} (Row {spec['state']['row_index']})")
+            run_job(job_id, spec, worker)
+        if args.once:
+            return
+
+
+if __name__ == "__main__":
+    setup_logging()
+    main()